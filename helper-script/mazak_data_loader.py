@@ -16,14 +16,18 @@ import os
 import sys
 import argparse
 import logging
+import struct
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import psycopg2
 from psycopg2.extras import execute_values
 from psycopg2 import sql
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
 import json
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from tqdm import tqdm
 import re
@@ -46,6 +50,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Prefer the multithreaded PyArrow CSV parser for whole-file reads when it is installed
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
 @dataclass
 class DatabaseConfig:
     """Database connection configuration"""
@@ -58,13 +69,330 @@ class DatabaseConfig:
     def get_connection_string(self) -> str:
         return f"postgresql://{self.username}:{self.password}@{self.host}:{self.port}/{self.database}"
 
+# ============================================================
+# Schema DDL
+# ============================================================
+
+# Tables are created up front; secondary indexes on the time-series tables are
+# only built after the bulk load so COPY does not pay per-row index maintenance.
+TABLES_SQL = """
+-- ============================================================
+-- MAZAK MANUFACTURING DATABASE SCHEMA
+-- ============================================================
+
+-- Master Data Tables
+CREATE TABLE IF NOT EXISTS machines (
+    machine_id SERIAL PRIMARY KEY,
+    machine_name VARCHAR(100) NOT NULL,
+    machine_model VARCHAR(50) NOT NULL,
+    machine_series VARCHAR(50),
+    device_name VARCHAR(100) NOT NULL,
+    device_uuid VARCHAR(255) NOT NULL,
+    location VARCHAR(100),
+    installation_date DATE,
+    manufacturer VARCHAR(100) DEFAULT 'Mazak',
+    asset_id VARCHAR(50),
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(machine_name, device_uuid)
+);
+
+CREATE TABLE IF NOT EXISTS data_types (
+    data_type_id SERIAL PRIMARY KEY,
+    data_type_name VARCHAR(50) NOT NULL UNIQUE,
+    description TEXT,
+    is_realtime BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS component_types (
+    component_type_id SERIAL PRIMARY KEY,
+    type_name VARCHAR(100) NOT NULL UNIQUE,
+    description TEXT,
+    category VARCHAR(50),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Configuration Tables
+CREATE TABLE IF NOT EXISTS machine_configurations (
+    config_id SERIAL PRIMARY KEY,
+    machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
+    data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
+    components_count INTEGER NOT NULL DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(machine_id, data_type_id)
+);
+
+CREATE TABLE IF NOT EXISTS machine_components (
+    component_id SERIAL PRIMARY KEY,
+    machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
+    data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
+    component_identifier VARCHAR(100) NOT NULL,
+    component_type_id INTEGER NOT NULL REFERENCES component_types(component_type_id),
+    component_name VARCHAR(100) NOT NULL,
+    has_conditions BOOLEAN DEFAULT FALSE,
+    has_samples BOOLEAN DEFAULT FALSE,
+    has_events BOOLEAN DEFAULT FALSE,
+    conditions_count INTEGER DEFAULT 0,
+    samples_count INTEGER DEFAULT 0,
+    events_count INTEGER DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(machine_id, data_type_id, component_identifier)
+);
+
+-- Time-series Data Tables (monthly partitions are created on demand by the loader)
+CREATE TABLE IF NOT EXISTS machine_conditions (
+    condition_id BIGSERIAL,
+    machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
+    data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
+    component_id INTEGER NOT NULL REFERENCES machine_components(component_id),
+    condition_name VARCHAR(100) NOT NULL,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+    sequence_number BIGINT,
+    state_value TEXT,
+    category VARCHAR(100),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (condition_id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE IF NOT EXISTS machine_samples (
+    sample_id BIGSERIAL,
+    machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
+    data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
+    component_id INTEGER NOT NULL REFERENCES machine_components(component_id),
+    sample_name VARCHAR(150) NOT NULL,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+    sequence_number BIGINT,
+    sample_value NUMERIC(20,6),
+    sub_type VARCHAR(50),
+    unit VARCHAR(20),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sample_id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE IF NOT EXISTS machine_events (
+    event_id BIGSERIAL,
+    machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
+    data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
+    component_id INTEGER NOT NULL REFERENCES machine_components(component_id),
+    event_name VARCHAR(150) NOT NULL,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+    sequence_number BIGINT,
+    event_value TEXT,
+    event_type VARCHAR(50),
+    severity INTEGER DEFAULT 1,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (event_id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Metadata Tables
+CREATE TABLE IF NOT EXISTS data_processing_batches (
+    batch_id SERIAL PRIMARY KEY,
+    file_name VARCHAR(255) NOT NULL,
+    machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
+    data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
+    processing_timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+    machine_identifier VARCHAR(100) NOT NULL,
+    total_json_files INTEGER NOT NULL DEFAULT 0,
+    total_xml_files INTEGER NOT NULL DEFAULT 0,
+    total_data_sources INTEGER NOT NULL DEFAULT 0,
+    processing_version VARCHAR(20),
+    data_source_range_start TIMESTAMP WITH TIME ZONE,
+    data_source_range_end TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(file_name)
+);
+"""
+
+TIME_SERIES_INDEXES = {
+    'idx_machine_conditions_timestamp': 'machine_conditions(timestamp)',
+    'idx_machine_conditions_machine_time': 'machine_conditions(machine_id, timestamp)',
+    'idx_machine_samples_timestamp': 'machine_samples(timestamp)',
+    'idx_machine_samples_machine_time': 'machine_samples(machine_id, timestamp)',
+    'idx_machine_events_timestamp': 'machine_events(timestamp)',
+    'idx_machine_events_machine_time': 'machine_events(machine_id, timestamp)',
+}
+
+INDEXES_SQL = "\n".join(
+    f"CREATE INDEX IF NOT EXISTS {name} ON {definition};"
+    for name, definition in TIME_SERIES_INDEXES.items()
+)
+
+# ============================================================
+# Reference data
+# ============================================================
+
+DATA_TYPES = [
+    ('current', 'Real-time operational data', True),
+    ('sample', 'Measurement and sensor samples', False)
+]
+
+COMPONENT_TYPES = [
+    ('Adapter', 'Data collection adapter', 'Control'),
+    ('Linear', 'Linear axis component', 'Mechanical'),
+    ('Rotary', 'Rotary axis component', 'Mechanical'),
+    ('Controller', 'Machine controller', 'Control'),
+    ('Path', 'Path/program control', 'Control'),
+    ('Axes', 'Axis system', 'Mechanical'),
+    ('Coolant', 'Coolant system', 'Fluid'),
+    ('Device', 'Generic device', 'System'),
+    ('Electric', 'Electrical system', 'Electrical'),
+    ('Hydraulic', 'Hydraulic system', 'Fluid'),
+    ('Lubrication', 'Lubrication system', 'Fluid'),
+    ('Pneumatic', 'Pneumatic system', 'Fluid'),
+    ('Door', 'Safety door system', 'Safety'),
+    ('Personnel', 'Personnel detection', 'Safety'),
+    ('Stock', 'Material stock handling', 'Material'),
+    ('Agent', 'Software agent', 'Software')
+]
+
+# ============================================================
+# Binary COPY encoding
+# ============================================================
+
+# Column types used for the time-series staging tables. Binary COPY is strict
+# about wire types, so staging uses these exact types and the final
+# INSERT ... SELECT casts into the target columns (e.g. float8 -> NUMERIC).
+TIME_SERIES_COLUMN_TYPES = {
+    'component_id': 'int4',
+    'machine_id': 'int4',
+    'data_type_id': 'int4',
+    'condition_name': 'text',
+    'sample_name': 'text',
+    'event_name': 'text',
+    'timestamp': 'timestamptz',
+    'sequence_number': 'int8',
+    'state_value': 'text',
+    'category': 'text',
+    'sample_value': 'float8',
+    'sub_type': 'text',
+    'event_value': 'text',
+}
+
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('!h', -1)
+PGCOPY_NULL = struct.pack('!i', -1)
+PG_EPOCH = pd.Timestamp('2000-01-01', tz='UTC')
+
+_INT4_FIELD = struct.Struct('!ii')
+_INT8_FIELD = struct.Struct('!iq')
+_FLOAT8_FIELD = struct.Struct('!id')
+
+@lru_cache(maxsize=65536)
+def _pack_text(value: str) -> bytes:
+    """Pack a text field; names repeat heavily, so encoded fields are cached"""
+    encoded = value.encode('utf-8')
+    return struct.pack('!i', len(encoded)) + encoded
+
+def copy_column_values(series: pd.Series, pg_type: str) -> List:
+    """Convert a column to plain Python values for binary COPY, with None for NULL"""
+    if pg_type in ('int4', 'int8'):
+        series = pd.to_numeric(series, errors='coerce').astype('Int64')
+    elif pg_type == 'float8':
+        series = pd.to_numeric(series, errors='coerce')
+    elif pg_type == 'timestamptz':
+        # Microseconds since the PostgreSQL epoch, computed for the whole column at once
+        timestamps = pd.to_datetime(series, utc=True, format='ISO8601', errors='coerce')
+        series = ((timestamps - PG_EPOCH) // pd.Timedelta(microseconds=1)).astype('Int64')
+    return series.astype(object).where(series.notna(), None).tolist()
+
+# Field expressions used when generating row writers; fixed-width types call the Struct directly
+_FIELD_EXPRESSIONS = {
+    'int4': 'int4_field(4, {value})',
+    'int8': 'int8_field(8, {value})',
+    'timestamptz': 'int8_field(8, {value})',
+    'float8': 'float8_field(8, {value})',
+    'text': 'pack_text({value})',
+}
+
+def build_row_writer(pg_types: List[str]) -> Callable:
+    """Generate a row writer specialized to one column layout, with the per-field packing unrolled"""
+    values = [f'v{i}' for i in range(len(pg_types))]
+    lines = [
+        'def write_rows(rows, write):',
+        f"    for {', '.join(values)}, in rows:",
+        '        write(FIELD_COUNT)',
+    ]
+    for value, pg_type in zip(values, pg_types):
+        field = _FIELD_EXPRESSIONS[pg_type].format(value=value)
+        lines.append(f'        write(NULL if {value} is None else {field})')
+    
+    namespace = {
+        'FIELD_COUNT': struct.pack('!h', len(pg_types)),
+        'NULL': PGCOPY_NULL,
+        'int4_field': _INT4_FIELD.pack,
+        'int8_field': _INT8_FIELD.pack,
+        'float8_field': _FLOAT8_FIELD.pack,
+        'pack_text': _pack_text,
+    }
+    exec('\n'.join(lines), namespace)
+    return namespace['write_rows']
+
+def encode_copy_binary(frame: pd.DataFrame, pg_types: List[str], write_rows: Optional[Callable] = None) -> BytesIO:
+    """Encode a DataFrame as a PostgreSQL binary COPY payload"""
+    columns = [copy_column_values(frame[column], pg_type) for column, pg_type in zip(frame.columns, pg_types)]
+    if write_rows is None:
+        write_rows = build_row_writer(pg_types)
+    
+    buffer = BytesIO()
+    buffer.write(PGCOPY_HEADER)
+    write_rows(zip(*columns), buffer.write)
+    buffer.write(PGCOPY_TRAILER)
+    
+    buffer.seek(0)
+    return buffer
+
+def unnest_column_values(series: pd.Series, pg_type: str) -> List:
+    """Convert a column for an INSERT ... SELECT FROM unnest(...) batch; timestamps stay ISO text"""
+    if pg_type == 'timestamptz':
+        return series.astype(object).where(series.notna(), None).tolist()
+    return copy_column_values(series, pg_type)
+
+# Machine names like 'mazak_1_vtc_200' (series + model) or 'mazak_3_350msy' (model only)
+_MACHINE_NAME_RE = re.compile(r'^[^_]*_[^_]*_([^_]*)(?:_([^_]*))?(_.*)?$')
+
+@lru_cache(maxsize=512)
+def _extract_machine_info(machine_name: str) -> Tuple[str, str]:
+    """Parse (model, series) from a machine name; cached since names repeat across rows"""
+    match = _MACHINE_NAME_RE.match(machine_name)
+    if match is None:
+        model = machine_name.upper()
+        return model, model
+    
+    base, suffix, extra = match.groups()
+    if suffix is not None and extra is None:  # mazak_1_vtc_200
+        series = base.upper()
+        return f"{series}-{suffix}", series
+    
+    model = base.upper()  # mazak_3_350msy
+    return model, model
+
 class MazakDataLoader:
     """Main class for loading Mazak manufacturing data into PostgreSQL"""
     
-    def __init__(self, db_config: DatabaseConfig, data_directory: str):
+    def __init__(self, db_config: DatabaseConfig, data_directory: str, workers: Optional[int] = None,
+                 load_method: str = 'copy'):
         self.db_config = db_config
         self.data_directory = Path(data_directory)
         self.connection = None
+        self._cursor = None
+        self._prepared_statements = set()
+        self._machines_df = None
+        self._component_lookup = None
+        self._partition_months = {}
+        self._row_builders = {}
+        
+        # Worker processes for the time-series loads; half the cores leaves room for the server
+        self.workers = workers if workers is not None else max(1, (os.cpu_count() or 2) // 2)
+        
+        # 'copy' (binary COPY via staging) or 'unnest' (INSERT ... SELECT FROM unnest) for time-series
+        if load_method not in ('copy', 'unnest'):
+            raise ValueError(f"Unknown load method: {load_method}")
+        self.load_method = load_method
         
         # Validate data directory
         if not self.data_directory.exists():
@@ -106,6 +434,18 @@ class MazakDataLoader:
                 password=self.db_config.password
             )
             self.connection.autocommit = False
+            
+            # One cursor is reused by every pipeline step instead of opening one per method
+            self._cursor = self.connection.cursor()
+            self._prepared_statements.clear()
+            
+            # Bulk-load session settings: a crashed load is simply re-run, so commit durability
+            # can be relaxed, and larger memory budgets speed up the INSERT ... SELECT and index builds
+            self._cursor.execute("SET synchronous_commit = OFF")
+            self._cursor.execute("SET work_mem = '256MB'")
+            self._cursor.execute("SET maintenance_work_mem = '1GB'")
+            self.connection.commit()
+            
             logger.info("Database connection established")
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
@@ -114,181 +454,59 @@ class MazakDataLoader:
     def disconnect(self):
         """Close database connection"""
         if self.connection:
+            self._cursor.close()
             self.connection.close()
             logger.info("Database connection closed")
     
     def create_schema(self):
-        """Create the complete database schema"""
-        schema_sql = """
-        -- ============================================================
-        -- MAZAK MANUFACTURING DATABASE SCHEMA
-        -- ============================================================
-        
-        -- Master Data Tables
-        CREATE TABLE IF NOT EXISTS machines (
-            machine_id SERIAL PRIMARY KEY,
-            machine_name VARCHAR(100) NOT NULL,
-            machine_model VARCHAR(50) NOT NULL,
-            machine_series VARCHAR(50),
-            device_name VARCHAR(100) NOT NULL,
-            device_uuid VARCHAR(255) NOT NULL,
-            location VARCHAR(100),
-            installation_date DATE,
-            manufacturer VARCHAR(100) DEFAULT 'Mazak',
-            asset_id VARCHAR(50),
-            is_active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(machine_name, device_uuid)
-        );
-        
-        CREATE TABLE IF NOT EXISTS data_types (
-            data_type_id SERIAL PRIMARY KEY,
-            data_type_name VARCHAR(50) NOT NULL UNIQUE,
-            description TEXT,
-            is_realtime BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        CREATE TABLE IF NOT EXISTS component_types (
-            component_type_id SERIAL PRIMARY KEY,
-            type_name VARCHAR(100) NOT NULL UNIQUE,
-            description TEXT,
-            category VARCHAR(50),
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Configuration Tables
-        CREATE TABLE IF NOT EXISTS machine_configurations (
-            config_id SERIAL PRIMARY KEY,
-            machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
-            data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
-            components_count INTEGER NOT NULL DEFAULT 0,
-            is_active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(machine_id, data_type_id)
-        );
-        
-        CREATE TABLE IF NOT EXISTS machine_components (
-            component_id SERIAL PRIMARY KEY,
-            machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
-            data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
-            component_identifier VARCHAR(100) NOT NULL,
-            component_type_id INTEGER NOT NULL REFERENCES component_types(component_type_id),
-            component_name VARCHAR(100) NOT NULL,
-            has_conditions BOOLEAN DEFAULT FALSE,
-            has_samples BOOLEAN DEFAULT FALSE,
-            has_events BOOLEAN DEFAULT FALSE,
-            conditions_count INTEGER DEFAULT 0,
-            samples_count INTEGER DEFAULT 0,
-            events_count INTEGER DEFAULT 0,
-            is_active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(machine_id, data_type_id, component_identifier)
-        );
-        
-        -- Time-series Data Tables
-        CREATE TABLE IF NOT EXISTS machine_conditions (
-            condition_id BIGSERIAL PRIMARY KEY,
-            machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
-            data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
-            component_id INTEGER NOT NULL REFERENCES machine_components(component_id),
-            condition_name VARCHAR(100) NOT NULL,
-            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
-            sequence_number BIGINT,
-            state_value TEXT,
-            category VARCHAR(100),
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        CREATE TABLE IF NOT EXISTS machine_samples (
-            sample_id BIGSERIAL PRIMARY KEY,
-            machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
-            data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
-            component_id INTEGER NOT NULL REFERENCES machine_components(component_id),
-            sample_name VARCHAR(150) NOT NULL,
-            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
-            sequence_number BIGINT,
-            sample_value NUMERIC(20,6),
-            sub_type VARCHAR(50),
-            unit VARCHAR(20),
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        CREATE TABLE IF NOT EXISTS machine_events (
-            event_id BIGSERIAL PRIMARY KEY,
-            machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
-            data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
-            component_id INTEGER NOT NULL REFERENCES machine_components(component_id),
-            event_name VARCHAR(150) NOT NULL,
-            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
-            sequence_number BIGINT,
-            event_value TEXT,
-            event_type VARCHAR(50),
-            severity INTEGER DEFAULT 1,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Metadata Tables
-        CREATE TABLE IF NOT EXISTS data_processing_batches (
-            batch_id SERIAL PRIMARY KEY,
-            file_name VARCHAR(255) NOT NULL,
-            machine_id INTEGER NOT NULL REFERENCES machines(machine_id),
-            data_type_id INTEGER NOT NULL REFERENCES data_types(data_type_id),
-            processing_timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
-            machine_identifier VARCHAR(100) NOT NULL,
-            total_json_files INTEGER NOT NULL DEFAULT 0,
-            total_xml_files INTEGER NOT NULL DEFAULT 0,
-            total_data_sources INTEGER NOT NULL DEFAULT 0,
-            processing_version VARCHAR(20),
-            data_source_range_start TIMESTAMP WITH TIME ZONE,
-            data_source_range_end TIMESTAMP WITH TIME ZONE,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(file_name)
-        );
-        
-        -- Create indexes
-        CREATE INDEX IF NOT EXISTS idx_machine_conditions_timestamp ON machine_conditions(timestamp);
-        CREATE INDEX IF NOT EXISTS idx_machine_conditions_machine_time ON machine_conditions(machine_id, timestamp);
-        CREATE INDEX IF NOT EXISTS idx_machine_samples_timestamp ON machine_samples(timestamp);
-        CREATE INDEX IF NOT EXISTS idx_machine_samples_machine_time ON machine_samples(machine_id, timestamp);
-        CREATE INDEX IF NOT EXISTS idx_machine_events_timestamp ON machine_events(timestamp);
-        CREATE INDEX IF NOT EXISTS idx_machine_events_machine_time ON machine_events(machine_id, timestamp);
-        """
-        
+        """Create the database tables (indexes are built separately by create_indexes)"""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(schema_sql)
+            cursor = self._cursor
+            cursor.execute(TABLES_SQL)
             self.connection.commit()
             logger.info("Database schema created successfully")
         except Exception as e:
             self.connection.rollback()
             logger.error(f"Failed to create schema: {e}")
             raise
-        finally:
-            cursor.close()
+    
+    def drop_indexes(self):
+        """Drop time-series secondary indexes ahead of a bulk load"""
+        try:
+            cursor = self._cursor
+            for index_name in TIME_SERIES_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+            self.connection.commit()
+            logger.info("Time-series indexes dropped for bulk load")
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Failed to drop indexes: {e}")
+            raise
+    
+    def create_indexes(self):
+        """Build time-series secondary indexes once the bulk load has finished"""
+        try:
+            cursor = self._cursor
+            cursor.execute(INDEXES_SQL)
+            self.connection.commit()
+            logger.info("Time-series indexes created successfully")
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Failed to create indexes: {e}")
+            raise
     
     def clear_all_data(self):
-        """Clear all data in the correct order (respecting foreign key constraints)"""
-        cursor = self.connection.cursor()
+        """Clear all data with a single TRUNCATE (reclaims pages and resets serial sequences)"""
+        cursor = self._cursor
         
         try:
-            # Delete in reverse dependency order
-            tables_to_clear = [
-                'machine_samples',
-                'machine_conditions', 
-                'machine_events',
-                'machine_components',
-                'machine_configurations',
-                'machines',
-                'component_types',
-                'data_types'
-            ]
-            
-            for table in tables_to_clear:
-                cursor.execute(f"DELETE FROM {table}")
-                logger.info(f"Cleared {table} table")
+            logger.info("Clearing existing data")
+            cursor.execute("""
+                TRUNCATE machine_samples, machine_conditions, machine_events,
+                         machine_components, machine_configurations, data_processing_batches,
+                         machines, component_types, data_types
+                RESTART IDENTITY CASCADE
+            """)
             
             self.connection.commit()
             logger.info("All data cleared successfully")
@@ -297,55 +515,25 @@ class MazakDataLoader:
             self.connection.rollback()
             logger.error(f"Failed to clear data: {e}")
             raise
-        finally:
-            cursor.close()
     
     def load_reference_data(self):
         """Load reference data (data types and component types)"""
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor
             
-            # Insert data types
-            data_types = [
-                ('current', 'Real-time operational data', True),
-                ('sample', 'Measurement and sensor samples', False)
-            ]
+            execute_values(cursor, """
+                INSERT INTO data_types (data_type_name, description, is_realtime) 
+                VALUES %s
+                ON CONFLICT (data_type_name) 
+                DO UPDATE SET description = EXCLUDED.description, is_realtime = EXCLUDED.is_realtime
+            """, DATA_TYPES)
             
-            for data_type in data_types:
-                cursor.execute("""
-                    INSERT INTO data_types (data_type_name, description, is_realtime) 
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT (data_type_name) 
-                    DO UPDATE SET description = EXCLUDED.description, is_realtime = EXCLUDED.is_realtime
-                """, data_type)
-            
-            # Insert component types
-            component_types = [
-                ('Adapter', 'Data collection adapter', 'Control'),
-                ('Linear', 'Linear axis component', 'Mechanical'),
-                ('Rotary', 'Rotary axis component', 'Mechanical'),
-                ('Controller', 'Machine controller', 'Control'),
-                ('Path', 'Path/program control', 'Control'),
-                ('Axes', 'Axis system', 'Mechanical'),
-                ('Coolant', 'Coolant system', 'Fluid'),
-                ('Device', 'Generic device', 'System'),
-                ('Electric', 'Electrical system', 'Electrical'),
-                ('Hydraulic', 'Hydraulic system', 'Fluid'),
-                ('Lubrication', 'Lubrication system', 'Fluid'),
-                ('Pneumatic', 'Pneumatic system', 'Fluid'),
-                ('Door', 'Safety door system', 'Safety'),
-                ('Personnel', 'Personnel detection', 'Safety'),
-                ('Stock', 'Material stock handling', 'Material'),
-                ('Agent', 'Software agent', 'Software')
-            ]
-            
-            for comp_type in component_types:
-                cursor.execute("""
-                    INSERT INTO component_types (type_name, description, category) 
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT (type_name) 
-                    DO UPDATE SET description = EXCLUDED.description, category = EXCLUDED.category
-                """, comp_type)
+            execute_values(cursor, """
+                INSERT INTO component_types (type_name, description, category) 
+                VALUES %s
+                ON CONFLICT (type_name) 
+                DO UPDATE SET description = EXCLUDED.description, category = EXCLUDED.category
+            """, COMPONENT_TYPES)
             
             self.connection.commit()
             logger.info("Reference data loaded successfully")
@@ -354,25 +542,49 @@ class MazakDataLoader:
             self.connection.rollback()
             logger.error(f"Failed to load reference data: {e}")
             raise
-        finally:
-            cursor.close()
     
     def extract_machine_info(self, machine_name: str) -> Tuple[str, str]:
         """Extract machine model and series from machine name"""
-        # Parse machine names like 'mazak_1_vtc_200', 'mazak_3_350msy'
-        parts = machine_name.split('_')
-        if len(parts) >= 3:
-            if len(parts) == 4:  # mazak_1_vtc_200
-                series = parts[2].upper()
-                model = f"{series}-{parts[3]}"
-            else:  # mazak_3_350msy
-                model = parts[2].upper()
-                series = model
-        else:
-            model = machine_name.upper()
-            series = model
+        return _extract_machine_info(machine_name)
+    
+    def _fetch_lookup(self, cursor, query: str) -> Dict:
+        """Run a lookup query returning (key..., id) rows and build a dict from it"""
+        cursor.execute(query)
+        lookup = {}
+        for row in cursor.fetchall():
+            key = row[0] if len(row) == 2 else tuple(row[:-1])
+            lookup[key] = row[-1]
+        return lookup
+    
+    def _copy_csv_to_staging(self, cursor, staging_table: str, file_path: Path) -> int:
+        """COPY a CSV file as-is into an all-text temp table and return the number of staged rows"""
+        columns = [f'"{column}"' for column in pd.read_csv(file_path, nrows=0).columns]
+        
+        # line_no keeps the file order so "last row wins" deduplication can be done in SQL
+        cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
+        cursor.execute(f"""
+            CREATE TEMP TABLE {staging_table} (
+                line_no BIGSERIAL,
+                {', '.join(f'{column} TEXT' for column in columns)}
+            )
+        """)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            cursor.copy_expert(
+                f"COPY {staging_table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT CSV, HEADER)", f
+            )
         
-        return model, series
+        cursor.execute(f"SELECT count(*) FROM {staging_table}")
+        return cursor.fetchone()[0]
+    
+    def _load_machines_csv(self) -> pd.DataFrame:
+        """Read machines.csv once; both the machines and configuration loads work from this frame"""
+        if self._machines_df is None:
+            self._machines_df = pd.read_csv(
+                self.data_directory / 'machines.csv',
+                engine=CSV_ENGINE,
+                usecols=['machine_name', 'device_name', 'device_uuid', 'data_type', 'components_count']
+            )
+        return self._machines_df
     
     def load_machines_data(self):
         """Load machines data from machines.csv"""
@@ -380,30 +592,30 @@ class MazakDataLoader:
         logger.info(f"Loading machines data from {file_path}")
         
         try:
-            df = pd.read_csv(file_path)
-            cursor = self.connection.cursor()
+            df = self._load_machines_csv()
+            cursor = self._cursor
             
             # Get unique machines (avoid duplicates)
-            unique_machines = df.drop_duplicates(subset=['machine_name', 'device_uuid'])
+            unique_machines = df.drop_duplicates(subset=['machine_name', 'device_uuid']).copy()
             
-            for _, row in tqdm(unique_machines.iterrows(), total=len(unique_machines), desc="Loading machines"):
-                machine_model, machine_series = self.extract_machine_info(row['machine_name'])
-                
-                # Generate asset_id from machine name
-                asset_id = f"MZ-{machine_model.replace('-', '')}-{row['machine_name'].split('_')[1].zfill(3)}"
-                
-                cursor.execute("""
-                    INSERT INTO machines (machine_name, machine_model, machine_series, device_name, device_uuid, asset_id)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (machine_name, device_uuid) DO NOTHING
-                """, (
-                    row['machine_name'],
-                    machine_model,
-                    machine_series,
-                    row['device_name'],
-                    row['device_uuid'],
-                    asset_id
-                ))
+            machine_info = unique_machines['machine_name'].map(self.extract_machine_info)
+            unique_machines['machine_model'] = [model for model, _ in machine_info]
+            unique_machines['machine_series'] = [series for _, series in machine_info]
+            
+            # Generate asset_id from machine name
+            unique_machines['asset_id'] = (
+                'MZ-'
+                + unique_machines['machine_model'].str.replace('-', '', regex=False)
+                + '-'
+                + unique_machines['machine_name'].str.split('_').str[1].str.zfill(3)
+            )
+            
+            columns = ['machine_name', 'machine_model', 'machine_series', 'device_name', 'device_uuid', 'asset_id']
+            execute_values(cursor, """
+                INSERT INTO machines (machine_name, machine_model, machine_series, device_name, device_uuid, asset_id)
+                VALUES %s
+                ON CONFLICT (machine_name, device_uuid) DO NOTHING
+            """, list(unique_machines[columns].itertuples(index=False, name=None)), page_size=5000)
             
             self.connection.commit()
             logger.info(f"Loaded {len(unique_machines)} unique machines")
@@ -412,8 +624,6 @@ class MazakDataLoader:
             self.connection.rollback()
             logger.error(f"Failed to load machines data: {e}")
             raise
-        finally:
-            cursor.close()
     
     def load_machine_configurations(self):
         """Load machine configurations from machines.csv"""
@@ -421,33 +631,40 @@ class MazakDataLoader:
         logger.info(f"Loading machine configurations from {file_path}")
         
         try:
-            df = pd.read_csv(file_path)
-            cursor = self.connection.cursor()
+            cursor = self._cursor
             
-            for _, row in tqdm(df.iterrows(), total=len(df), desc="Loading configurations"):
-                cursor.execute("""
-                    INSERT INTO machine_configurations (machine_id, data_type_id, components_count)
-                    SELECT m.machine_id, dt.data_type_id, %s
-                    FROM machines m, data_types dt
-                    WHERE m.machine_name = %s AND m.device_uuid = %s AND dt.data_type_name = %s
-                    ON CONFLICT (machine_id, data_type_id) 
-                    DO UPDATE SET components_count = EXCLUDED.components_count
-                """, (
-                    row['components_count'],
-                    row['machine_name'],
-                    row['device_uuid'],
-                    row['data_type']
-                ))
+            machine_ids = self._fetch_lookup(cursor, "SELECT machine_name, device_uuid, machine_id FROM machines")
+            data_type_ids = self._fetch_lookup(cursor, "SELECT data_type_name, data_type_id FROM data_types")
+            
+            # The cached frame is shared with load_machines_data, so ids go onto a new frame
+            df = self._load_machines_csv()
+            df = df.assign(
+                machine_id=[machine_ids.get(key) for key in zip(df['machine_name'], df['device_uuid'])],
+                data_type_id=df['data_type'].map(data_type_ids)
+            )
+            
+            # Later rows win, matching the previous row-by-row upsert order
+            configurations = (
+                df.dropna(subset=['machine_id', 'data_type_id'])
+                  .drop_duplicates(subset=['machine_id', 'data_type_id'], keep='last')
+                  .astype({'machine_id': int, 'data_type_id': int})
+            )
+            
+            execute_values(cursor, """
+                INSERT INTO machine_configurations (machine_id, data_type_id, components_count)
+                VALUES %s
+                ON CONFLICT (machine_id, data_type_id) 
+                DO UPDATE SET components_count = EXCLUDED.components_count
+            """, list(configurations[['machine_id', 'data_type_id', 'components_count']].itertuples(index=False, name=None)),
+                page_size=5000)
             
             self.connection.commit()
-            logger.info(f"Loaded {len(df)} machine configurations")
+            logger.info(f"Loaded {len(configurations)} machine configurations")
             
         except Exception as e:
             self.connection.rollback()
             logger.error(f"Failed to load machine configurations: {e}")
             raise
-        finally:
-            cursor.close()
     
     def load_components_data(self):
         """Load components data from components.csv"""
@@ -455,65 +672,66 @@ class MazakDataLoader:
         logger.info(f"Loading components data from {file_path}")
         
         try:
-            df = pd.read_csv(file_path)
-            cursor = self.connection.cursor()
+            cursor = self._cursor
+            staged = self._copy_csv_to_staging(cursor, 'components_staging', file_path)
             
-            for _, row in tqdm(df.iterrows(), total=len(df), desc="Loading components"):
-                cursor.execute("""
-                    INSERT INTO machine_components (
-                        machine_id, data_type_id, component_identifier, component_type_id,
-                        component_name, has_conditions, has_samples, has_events,
-                        conditions_count, samples_count, events_count
-                    )
-                    SELECT m.machine_id, dt.data_type_id, %s, ct.component_type_id, %s, %s, %s, %s, %s, %s, %s
-                    FROM machines m, data_types dt, component_types ct
-                    WHERE m.machine_name = %s AND dt.data_type_name = %s AND ct.type_name = %s
-                    ON CONFLICT (machine_id, data_type_id, component_identifier) 
-                    DO UPDATE SET
-                        component_name = EXCLUDED.component_name,
-                        has_conditions = EXCLUDED.has_conditions,
-                        has_samples = EXCLUDED.has_samples,
-                        has_events = EXCLUDED.has_events,
-                        conditions_count = EXCLUDED.conditions_count,
-                        samples_count = EXCLUDED.samples_count,
-                        events_count = EXCLUDED.events_count,
-                        updated_at = CURRENT_TIMESTAMP
-                """, (
-                    row['component_id'],
-                    row['component_name'],
-                    row['has_conditions'],
-                    row['has_samples'],
-                    row['has_events'],
-                    row['conditions_count'],
-                    row['samples_count'],
-                    row['events_count'],
-                    row['machine_name'],
-                    row['data_type'],
-                    row['component_type']
-                ))
+            # Ids are resolved by joining the small lookup tables server-side; DISTINCT ON keeps
+            # the last row per component as the upsert cannot touch the same row twice
+            cursor.execute("""
+                INSERT INTO machine_components (
+                    machine_id, data_type_id, component_identifier, component_type_id,
+                    component_name, has_conditions, has_samples, has_events,
+                    conditions_count, samples_count, events_count
+                )
+                SELECT DISTINCT ON (m.machine_id, dt.data_type_id, s.component_id)
+                    m.machine_id, dt.data_type_id, s.component_id, ct.component_type_id,
+                    s.component_name, s.has_conditions::boolean, s.has_samples::boolean, s.has_events::boolean,
+                    s.conditions_count::numeric::integer, s.samples_count::numeric::integer,
+                    s.events_count::numeric::integer
+                FROM components_staging s
+                JOIN (
+                    SELECT machine_name, max(machine_id) AS machine_id FROM machines GROUP BY machine_name
+                ) m ON m.machine_name = s.machine_name
+                JOIN data_types dt ON dt.data_type_name = s.data_type
+                JOIN component_types ct ON ct.type_name = s.component_type
+                ORDER BY m.machine_id, dt.data_type_id, s.component_id, s.line_no DESC
+                ON CONFLICT (machine_id, data_type_id, component_identifier) 
+                DO UPDATE SET
+                    component_name = EXCLUDED.component_name,
+                    has_conditions = EXCLUDED.has_conditions,
+                    has_samples = EXCLUDED.has_samples,
+                    has_events = EXCLUDED.has_events,
+                    conditions_count = EXCLUDED.conditions_count,
+                    samples_count = EXCLUDED.samples_count,
+                    events_count = EXCLUDED.events_count,
+                    updated_at = CURRENT_TIMESTAMP
+            """)
+            loaded = cursor.rowcount
+            cursor.execute("DROP TABLE components_staging")
+            
+            skipped = staged - loaded
+            if skipped:
+                logger.warning(f"Skipped {skipped} component rows without a matching machine, data type or component type, "
+                               f"or superseded by a later row")
             
             self.connection.commit()
-            logger.info(f"Loaded {len(df)} components")
+            self._component_lookup = None
+            logger.info(f"Loaded {loaded} components")
             
         except Exception as e:
             self.connection.rollback()
             logger.error(f"Failed to load components data: {e}")
             raise
-        finally:
-            cursor.close()
     
-    def load_time_series_data(self, table_name: str, csv_file: str, columns_mapping: Dict[str, str]):
-        """Generic method to load time-series data"""
-        file_path = self.data_directory / csv_file
-        logger.info(f"Loading {table_name} data from {file_path}")
+    def _get_component_lookup(self) -> pd.DataFrame:
+        """Fetch (and cache) the frame used to resolve time-series rows to component ids"""
+        if self._component_lookup is not None:
+            return self._component_lookup
         
+        # Server-side cursor streams the join in batches instead of one large fetchall()
+        cursor = self.connection.cursor(name='component_lookup')
+        cursor.itersize = 10000
         try:
-            # First, get total line count for progress tracking
-            total_lines = sum(1 for _ in open(file_path)) - 1  # Subtract header
-            logger.info(f"Processing {total_lines} rows from {csv_file}")
-            
-            # Create lookup cache for performance
-            cursor = self.connection.cursor()
             cursor.execute("""
                 SELECT m.machine_name, dt.data_type_name, mc.component_identifier,
                        mc.component_id, m.machine_id, dt.data_type_id
@@ -521,76 +739,191 @@ class MazakDataLoader:
                 JOIN machines m ON mc.machine_id = m.machine_id
                 JOIN data_types dt ON mc.data_type_id = dt.data_type_id
             """)
+            self._component_lookup = pd.DataFrame.from_records(
+                cursor,
+                columns=['machine_name', 'data_type', 'component_identifier',
+                         'db_component_id', 'machine_id', 'data_type_id']
+            )
+        finally:
+            cursor.close()
+        
+        return self._component_lookup
+    
+    def _ensure_month_partitions(self, cursor, table_name: str, timestamps: pd.Series):
+        """Create the monthly partitions of a time-series table needed for the given timestamps"""
+        if table_name not in self._partition_months:
+            # Tables created before partitioning was introduced are left as they are
+            cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", (table_name,))
+            if cursor.fetchone():
+                # Months that already have a partition need no DDL, so workers loading after
+                # create_month_partitions never lock the tables the partitions reference
+                cursor.execute("""
+                    SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = %s::regclass
+                """, (table_name,))
+                prefix = f"{table_name}_"
+                self._partition_months[table_name] = {
+                    name[len(prefix):] for (name,) in cursor.fetchall() if name.startswith(prefix)
+                }
+            else:
+                self._partition_months[table_name] = None
+        
+        known_months = self._partition_months[table_name]
+        if known_months is None:
+            return
+        
+        parsed = pd.to_datetime(timestamps, utc=True, format='ISO8601', errors='coerce').dropna()
+        for month in parsed.dt.strftime('%Y_%m').unique():
+            if month in known_months:
+                continue
+            
+            start = pd.Timestamp(f"{month.replace('_', '-')}-01", tz='UTC')
+            end = start + pd.offsets.MonthBegin(1)
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table_name}_{month}
+                PARTITION OF {table_name} FOR VALUES FROM (%s) TO (%s)
+            """, (start.isoformat(), end.isoformat()))
+            known_months.add(month)
+            logger.info(f"Using partition {table_name}_{month}")
+    
+    def create_month_partitions(self):
+        """Create and commit every monthly partition the time-series CSV files need
+        
+        Attaching a partition adds foreign key triggers, which locks the referenced tables
+        until commit. Doing it up front keeps the parallel loaders from queueing on each
+        other's partition DDL for the length of a whole file.
+        """
+        time_series_files = {
+            'machine_conditions': 'conditions.csv',
+            'machine_samples': 'samples.csv',
+            'machine_events': 'events.csv',
+        }
+        
+        try:
+            cursor = self._cursor
+            for table_name, csv_file in time_series_files.items():
+                file_path = self.data_directory / csv_file
+                if not file_path.exists():
+                    continue
+                
+                # Only the distinct timestamp strings of each chunk are parsed
+                for chunk in pd.read_csv(file_path, chunksize=1000000, usecols=['timestamp'], dtype=str):
+                    self._ensure_month_partitions(cursor, table_name, pd.Series(chunk['timestamp'].unique()))
+            
+            self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Failed to create time-series partitions: {e}")
+            raise
+    
+    def load_time_series_data(self, table_name: str, csv_file: str, columns_mapping: Dict[str, str]):
+        """Generic method to load time-series data"""
+        file_path = self.data_directory / csv_file
+        logger.info(f"Loading {table_name} data from {file_path}")
+        
+        try:
+            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+            logger.info(f"Processing {csv_file} ({file_size_mb:.1f} MB)")
+            
+            lookup_df = self._get_component_lookup()
+            cursor = self._cursor
+            
+            logger.info(f"Built lookup cache with {len(lookup_df)} entries")
             
-            # Build lookup dictionary for fast access
-            lookup_cache = {}
-            for row in cursor.fetchall():
-                machine_name, data_type_name, component_identifier, component_id, machine_id, data_type_id = row
-                key = (machine_name, data_type_name, component_identifier)
-                lookup_cache[key] = (component_id, machine_id, data_type_id)
+            columns = ['component_id', 'machine_id', 'data_type_id'] + list(columns_mapping.values())
+            column_types = [TIME_SERIES_COLUMN_TYPES[column] for column in columns]
+            column_list = ', '.join(columns)
+            staging_table = f"{table_name}_staging"
             
-            logger.info(f"Built lookup cache with {len(lookup_cache)} entries")
+            if self.load_method == 'copy':
+                # Stage rows in a session-local temp table (no WAL) and stream them in via binary COPY
+                cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
+                cursor.execute(f"""
+                    CREATE TEMP TABLE {staging_table} (
+                        {', '.join(f'{column} {pg_type}' for column, pg_type in zip(columns, column_types))}
+                    )
+                """)
+                copy_sql = f"COPY {staging_table} ({column_list}) FROM STDIN WITH (FORMAT BINARY)"
+                
+                # Row writer generated once per table for its column layout
+                if table_name not in self._row_builders:
+                    self._row_builders[table_name] = build_row_writer(column_types)
+                write_rows = self._row_builders[table_name]
+            else:
+                # COPY may be restricted (e.g. managed services): send one typed array per column instead,
+                # through a statement prepared once per session so each chunk skips parse/plan
+                statement_name = f"{table_name}_unnest_insert"
+                if statement_name not in self._prepared_statements:
+                    cursor.execute(f"""
+                        PREPARE {statement_name} ({', '.join(f'{pg_type}[]' for pg_type in column_types)}) AS
+                        INSERT INTO {table_name} ({column_list})
+                        SELECT * FROM unnest({', '.join(f'${i}' for i in range(1, len(columns) + 1))})
+                    """)
+                    self._prepared_statements.add(statement_name)
+                unnest_sql = f"EXECUTE {statement_name} ({', '.join(f'%s::{pg_type}[]' for pg_type in column_types)})"
+            
+            key_columns = ['machine_name', 'data_type', 'component_id']
+            output_columns = ['db_component_id', 'machine_id', 'data_type_id'] + list(columns_mapping.keys())
             
-            # Read CSV in chunks to handle large files
-            chunk_size = 5000  # Reduced chunk size for better memory management
+            # Read CSV in chunks to handle large files; only the columns we load are parsed
+            # (the PyArrow engine does not support chunked reads, so the C parser is used here)
+            chunk_size = 100000
             total_rows = 0
             processed_rows = 0
             
-            # Use tqdm with total count for accurate progress
-            with tqdm(total=total_lines, desc=f"Loading {table_name}") as pbar:
-                for chunk in pd.read_csv(file_path, chunksize=chunk_size):
-                    # Prepare data for bulk insert
-                    data_rows = []
+            # Progress is tracked in rows as they stream in, avoiding a separate counting pass
+            with tqdm(desc=f"Loading {table_name}", unit=' rows') as pbar:
+                for chunk in pd.read_csv(
+                    file_path,
+                    chunksize=chunk_size,
+                    usecols=key_columns + list(columns_mapping.keys()),
+                    dtype=str  # raw text; typed per column by the binary COPY encoder
+                ):
+                    processed_rows += len(chunk)
                     
-                    for _, row in chunk.iterrows():
-                        processed_rows += 1
-                        
-                        # Fast lookup using cache
-                        key = (row['machine_name'], row['data_type'], row['component_id'])
-                        if key in lookup_cache:
-                            component_id, machine_id, data_type_id = lookup_cache[key]
-                            
-                            # Build row data based on columns mapping
-                            row_data = [component_id, machine_id, data_type_id]
-                            for csv_col, db_col in columns_mapping.items():
-                                value = row[csv_col]
-                                # Handle NULL/empty values
-                                if pd.isna(value) or value == '':
-                                    value = None
-                                row_data.append(value)
-                            
-                            data_rows.append(tuple(row_data))
-                        else:
-                            logger.warning(f"No matching component found for: {key}")
+                    # Resolve component/machine/data type ids for the whole chunk at once
+                    merged = chunk.merge(
+                        lookup_df,
+                        left_on=key_columns,
+                        right_on=['machine_name', 'data_type', 'component_identifier'],
+                        how='inner'
+                    )
                     
-                    # Bulk insert
-                    if data_rows:
-                        columns = ['component_id', 'machine_id', 'data_type_id'] + list(columns_mapping.values())
-                        
-                        insert_sql = f"""
-                            INSERT INTO {table_name} ({', '.join(columns)})
-                            VALUES %s
-                        """
-                        
-                        execute_values(cursor, insert_sql, data_rows, page_size=1000)
-                        total_rows += len(data_rows)
+                    unmatched = len(chunk) - len(merged)
+                    if unmatched:
+                        logger.warning(f"No matching component found for {unmatched} rows in {csv_file}")
+                    
+                    # Bulk copy into staging (or insert directly from column arrays)
+                    if len(merged):
+                        self._ensure_month_partitions(cursor, table_name, merged['timestamp'])
+                        if self.load_method == 'copy':
+                            buffer = encode_copy_binary(merged[output_columns], column_types, write_rows)
+                            cursor.copy_expert(copy_sql, buffer)
+                        else:
+                            cursor.execute(unnest_sql, [
+                                unnest_column_values(merged[column], pg_type)
+                                for column, pg_type in zip(output_columns, column_types)
+                            ])
+                        total_rows += len(merged)
                     
                     # Update progress bar
                     pbar.update(len(chunk))
-                    
-                    # Commit every few chunks to avoid long transactions
-                    if processed_rows % (chunk_size * 5) == 0:
-                        self.connection.commit()
+            
+            # Move staged rows into the target table in a single statement
+            if self.load_method == 'copy':
+                cursor.execute(f"""
+                    INSERT INTO {table_name} ({column_list})
+                    SELECT {column_list} FROM {staging_table}
+                """)
+                cursor.execute(f"DROP TABLE {staging_table}")
             
             self.connection.commit()
-            logger.info(f"Loaded {total_rows} rows into {table_name}")
+            logger.info(f"Loaded {total_rows} of {processed_rows} rows into {table_name}")
             
         except Exception as e:
             self.connection.rollback()
             logger.error(f"Failed to load {table_name} data: {e}")
             raise
-        finally:
-            cursor.close()
     
     def load_conditions_data(self):
         """Load conditions data from conditions.csv"""
@@ -624,50 +957,93 @@ class MazakDataLoader:
         }
         self.load_time_series_data('machine_events', 'events.csv', columns_mapping)
     
+    def load_time_series_parallel(self):
+        """Load conditions, samples and events concurrently, one process and connection per file"""
+        loader_methods = ['load_conditions_data', 'load_samples_data', 'load_events_data']
+        workers = min(len(loader_methods), self.workers)
+        
+        self.create_month_partitions()
+        
+        if workers <= 1:
+            for method_name in loader_methods:
+                getattr(self, method_name)()
+            return
+        
+        # The three tables only depend on machine_components, which is already committed
+        logger.info(f"Loading time-series data with {workers} worker processes")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    _run_loader_method, self.db_config, str(self.data_directory), self.load_method, method_name
+                ): method_name
+                for method_name in loader_methods
+            }
+            for future in as_completed(futures):
+                future.result()
+                logger.info(f"Finished {futures[future]}")
+    
     def load_metadata(self):
         """Load processing metadata from metadata.csv"""
         file_path = self.data_directory / 'metadata.csv'
         logger.info(f"Loading metadata from {file_path}")
         
         try:
-            df = pd.read_csv(file_path)
-            cursor = self.connection.cursor()
+            cursor = self._cursor
+            self._copy_csv_to_staging(cursor, 'metadata_staging', file_path)
             
-            for _, row in tqdm(df.iterrows(), total=len(df), desc="Loading metadata"):
-                cursor.execute("""
-                    INSERT INTO data_processing_batches (
-                        file_name, machine_id, data_type_id, processing_timestamp,
-                        machine_identifier, total_json_files, total_xml_files, total_data_sources
-                    )
-                    SELECT %s, m.machine_id, dt.data_type_id, %s, %s, %s, %s, %s
-                    FROM machines m, data_types dt
-                    WHERE m.machine_name = %s AND dt.data_type_name = %s
-                    ON CONFLICT (file_name) DO NOTHING
-                """, (
-                    row['file_name'],
-                    row['created_at'],
-                    row['machine_id'],
-                    row['total_json_files'],
-                    row['total_xml_files'],
-                    row['total_data_sources'],
-                    row['machine_name'],
-                    row['data_type']
-                ))
+            cursor.execute("""
+                INSERT INTO data_processing_batches (
+                    file_name, machine_id, data_type_id, processing_timestamp,
+                    machine_identifier, total_json_files, total_xml_files, total_data_sources
+                )
+                SELECT s.file_name, m.machine_id, dt.data_type_id, s.created_at::timestamptz,
+                       s.machine_id, s.total_json_files::numeric::integer, s.total_xml_files::numeric::integer,
+                       s.total_data_sources::numeric::integer
+                FROM metadata_staging s
+                JOIN (
+                    SELECT machine_name, max(machine_id) AS machine_id FROM machines GROUP BY machine_name
+                ) m ON m.machine_name = s.machine_name
+                JOIN data_types dt ON dt.data_type_name = s.data_type
+                ORDER BY s.line_no
+                ON CONFLICT (file_name) DO NOTHING
+            """)
+            loaded = cursor.rowcount
+            cursor.execute("DROP TABLE metadata_staging")
             
             self.connection.commit()
-            logger.info(f"Loaded {len(df)} metadata records")
+            logger.info(f"Loaded {loaded} metadata records")
             
         except Exception as e:
             self.connection.rollback()
             logger.error(f"Failed to load metadata: {e}")
             raise
-        finally:
-            cursor.close()
     
     def create_views(self):
         """Create analytical views for dashboard use"""
         views_sql = """
-        -- Real-time Machine Status View
+        -- Last activity per machine, computed with one GROUP BY scan per table
+        -- and materialized so dashboard queries do not rescan the time-series tables
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_machine_last_activity AS
+        WITH last_samples AS (
+            SELECT machine_id, MAX(timestamp) AS last_sample_time
+            FROM machine_samples
+            GROUP BY machine_id
+        ),
+        last_events AS (
+            SELECT machine_id, MAX(timestamp) AS last_event_time
+            FROM machine_events
+            GROUP BY machine_id
+        )
+        SELECT m.machine_id, ls.last_sample_time, le.last_event_time
+        FROM machines m
+        LEFT JOIN last_samples ls ON ls.machine_id = m.machine_id
+        LEFT JOIN last_events le ON le.machine_id = m.machine_id;
+        
+        -- Unique index is required for REFRESH ... CONCURRENTLY
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_machine_last_activity_machine
+            ON mv_machine_last_activity(machine_id);
+        
+        -- Real-time Machine Status View (status stays relative to the current time)
         CREATE OR REPLACE VIEW v_machine_status AS
         SELECT DISTINCT ON (m.machine_id, dt.data_type_name)
             m.machine_id,
@@ -676,23 +1052,27 @@ class MazakDataLoader:
             m.asset_id,
             dt.data_type_name,
             mc.components_count,
-            (SELECT MAX(timestamp) FROM machine_samples ms WHERE ms.machine_id = m.machine_id) as last_sample_time,
-            (SELECT MAX(timestamp) FROM machine_events me WHERE me.machine_id = m.machine_id) as last_event_time,
+            la.last_sample_time,
+            la.last_event_time,
             CASE 
-                WHEN (SELECT MAX(timestamp) FROM machine_samples ms WHERE ms.machine_id = m.machine_id) > CURRENT_TIMESTAMP - INTERVAL '5 minutes' 
+                WHEN la.last_sample_time > CURRENT_TIMESTAMP - INTERVAL '5 minutes' 
                 THEN 'ONLINE'
-                WHEN (SELECT MAX(timestamp) FROM machine_samples ms WHERE ms.machine_id = m.machine_id) > CURRENT_TIMESTAMP - INTERVAL '1 hour'
+                WHEN la.last_sample_time > CURRENT_TIMESTAMP - INTERVAL '1 hour'
                 THEN 'IDLE'
                 ELSE 'OFFLINE'
             END as connection_status
         FROM machines m
+        LEFT JOIN mv_machine_last_activity la ON la.machine_id = m.machine_id
         LEFT JOIN machine_configurations mc ON m.machine_id = mc.machine_id
         LEFT JOIN data_types dt ON mc.data_type_id = dt.data_type_id
         WHERE m.is_active = TRUE AND mc.is_active = TRUE;
+        
+        -- Pick up rows loaded since the view was first created
+        REFRESH MATERIALIZED VIEW CONCURRENTLY mv_machine_last_activity;
         """
         
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor
             cursor.execute(views_sql)
             self.connection.commit()
             logger.info("Analytical views created successfully")
@@ -700,8 +1080,6 @@ class MazakDataLoader:
             self.connection.rollback()
             logger.error(f"Failed to create views: {e}")
             raise
-        finally:
-            cursor.close()
     
     def run_full_load(self):
         """Execute the complete data loading process"""
@@ -735,15 +1113,14 @@ class MazakDataLoader:
             logger.info("Step 5: Loading components data")
             self.load_components_data()
             
-            # Step 6: Load time-series data
-            logger.info("Step 6: Loading conditions data")
-            self.load_conditions_data()
+            # Step 6: Load time-series data (indexes are rebuilt afterwards)
+            self.drop_indexes()
             
-            logger.info("Step 7: Loading samples data")
-            self.load_samples_data()
+            logger.info("Steps 6-8: Loading conditions, samples and events data")
+            self.load_time_series_parallel()
             
-            logger.info("Step 8: Loading events data")
-            self.load_events_data()
+            logger.info("Step 8.5: Creating time-series indexes")
+            self.create_indexes()
             
             # Step 7: Load metadata
             logger.info("Step 9: Loading metadata")
@@ -765,6 +1142,15 @@ class MazakDataLoader:
         finally:
             self.disconnect()
 
+def _run_loader_method(db_config: DatabaseConfig, data_directory: str, load_method: str, method_name: str):
+    """Worker entry point: run one loader method on its own database connection"""
+    loader = MazakDataLoader(db_config, data_directory, workers=1, load_method=load_method)
+    loader.connect()
+    try:
+        getattr(loader, method_name)()
+    finally:
+        loader.disconnect()
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='Load Mazak manufacturing data into PostgreSQL')
@@ -798,6 +1184,18 @@ def main():
         default=os.getenv('PGPASSWORD'),
         help='Database password (default: PGPASSWORD env var)'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Worker processes for time-series loads (default: half the CPU cores, 1 disables)'
+    )
+    parser.add_argument(
+        '--load-method',
+        choices=['copy', 'unnest'],
+        default='copy',
+        help='Time-series insert path: binary COPY (default) or INSERT ... SELECT FROM unnest for servers without COPY'
+    )
     
     args = parser.parse_args()
     
@@ -812,7 +1210,7 @@ def main():
     
     try:
         # Create and run data loader
-        loader = MazakDataLoader(db_config, args.data_dir)
+        loader = MazakDataLoader(db_config, args.data_dir, workers=args.workers, load_method=args.load_method)
         loader.run_full_load()
         
         print("\n" + "="*60)
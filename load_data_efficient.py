@@ -5,12 +5,27 @@ Uses COPY FROM STDIN for maximum performance and proper connection management.
 """
 
 import os
+import re
 import csv
+import struct
+import threading
 import psycopg2
-from io import StringIO
-from datetime import datetime
+from psycopg2.extras import execute_values
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import islice
 import argparse
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from operator import itemgetter
+
+# PyArrow's multi-threaded CSV reader is used when available
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:
+    pacsv = None
 
 # Database connection parameters
 DB_PARAMS = {
@@ -21,339 +36,528 @@ DB_PARAMS = {
     'password': 'tableplus',
 }
 
-def get_machine_id_by_name(cur, machine_name):
-    """Get machine ID by name, create if doesn't exist"""
-    machine_mapping = {
-        'mazak_1_vtc_200': 'VTC-200-001',
-        'mazak_2_vtc_300': 'VTC-300-001', 
-        'mazak_3_350msy': '350MSY-001',
-        'mazak_4_vtc_300c': 'VTC-300C-001'
-    }
+# Buffer size for the pipe feeding COPY FROM STDIN
+PIPE_BUFFER_SIZE = 1 << 20
+
+# Session settings for the loader connections (server-wide, the same values can be applied
+# with ALTER SYSTEM SET ... followed by SELECT pg_reload_conf()):
+# - synchronous_commit: each file loads in one transaction and a crashed load is simply
+#   re-run, so its commit does not need to wait for the WAL flush
+# - temp_buffers: keeps the temp staging tables in memory (must be set before their first use)
+# - work_mem / maintenance_work_mem: INSERT ... SELECT from staging and the index rebuilds
+# - jit: compiling plans only adds startup time to these short statements
+# commit_delay is left alone as it needs superuser rights before PostgreSQL 15.
+LOAD_SESSION_SETTINGS = (
+    "SET synchronous_commit = off",
+    "SET temp_buffers = '512MB'",
+    "SET work_mem = '256MB'",
+    "SET maintenance_work_mem = '2GB'",
+    "SET jit = off",
+)
+
+# Block size for the PyArrow CSV reader
+CSV_BLOCK_SIZE = 1 << 22
+
+# PostgreSQL binary COPY framing
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('!h', -1)
+PGCOPY_NULL = struct.pack('!i', -1)
+PG_EPOCH = datetime(2000, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+INT4_FIELD = struct.Struct('!ii')
+INT8_FIELD = struct.Struct('!iq')
+FLOAT8_FIELD = struct.Struct('!id')
+
+# Binary COPY needs exact wire types, so rows are staged with these types and cast
+# into samples/events (float8 -> DECIMAL, text -> enums) by a single INSERT ... SELECT
+SAMPLES_STAGING_SQL = """
+    CREATE TEMP TABLE samples_staging (
+        data_stream_id int4, component_id int4, data_item_id text, sample_name text,
+        timestamp timestamp, sequence int4, value float8, sub_type text, composition_id text
+    )
+"""
+
+EVENTS_STAGING_SQL = """
+    CREATE TEMP TABLE events_staging (
+        data_stream_id int4, component_id int4, data_item_id text, event_name text,
+        timestamp timestamp, sequence int4, value text, event_type text
+    )
+"""
+
+@lru_cache(maxsize=65536)
+def pack_text(value):
+    """Pack a binary COPY text field; names repeat heavily, so encoded fields are cached"""
+    encoded = value.encode('utf-8')
+    return struct.pack('!i', len(encoded)) + encoded
+
+# UTC ISO-8601 timestamps as written by the processing scripts, e.g. 2025-07-07T15:24:14.123Z
+TIMESTAMP_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6})\d*)?Z$')
+PG_EPOCH_ORDINAL = PG_EPOCH.toordinal()
+
+# Sample values that float() accepts and the DECIMAL column can hold
+NUMERIC_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?$')
+
+@lru_cache(maxsize=4096)
+def days_since_pg_epoch(year, month, day):
+    """Days between the PostgreSQL epoch and a date; dates repeat across rows, so cached"""
+    return date(int(year), int(month), int(day)).toordinal() - PG_EPOCH_ORDINAL
+
+def pack_timestamp(text):
+    """Pack an ISO-8601 timestamp as microseconds since the PostgreSQL epoch"""
+    match = TIMESTAMP_RE.match(text)
+    if match is None:
+        # Anything other than plain UTC 'Z' timestamps takes the slow path; the offset is
+        # dropped, as when the text is cast to a TIMESTAMP column, and naive values are kept
+        timestamp = datetime.fromisoformat(text.replace('Z', '+00:00')).replace(tzinfo=None)
+        return INT8_FIELD.pack(8, (timestamp - PG_EPOCH) // ONE_MICROSECOND)
+    
+    year, month, day, hour, minute, second, fraction = match.groups()
+    seconds = days_since_pg_epoch(year, month, day) * 86400 + int(hour) * 3600 + int(minute) * 60 + int(second)
+    micros = int(fraction.ljust(6, '0')) if fraction else 0
+    return INT8_FIELD.pack(8, seconds * 1000000 + micros)
+
+@lru_cache(maxsize=4096)
+def event_type_field(event_name):
+    """Classify an event name and pack its event_type; event names repeat, so each is classified once"""
+    name = event_name.lower()
+    if 'program' in name:
+        event_type = 'PROGRAM'
+    elif 'door' in name or 'safety' in name:
+        event_type = 'SAFETY'
+    elif 'control' in name:
+        event_type = 'CONTROL'
+    else:
+        event_type = 'EXECUTION'
+    return pack_text(event_type)
+
+# Processed-data machine names mapped to the names used in the machines table
+MACHINE_NAME_MAPPING = {
+    'mazak_1_vtc_200': 'VTC-200-001',
+    'mazak_2_vtc_300': 'VTC-300-001', 
+    'mazak_3_350msy': '350MSY-001',
+    'mazak_4_vtc_300c': 'VTC-300C-001'
+}
+
+# MTConnect component types mapped to component_type_enum
+COMPONENT_TYPE_MAPPING = {
+    'Linear': 'LINEAR',
+    'Rotary': 'ROTARY', 
+    'Controller': 'CONTROLLER',
+    'Adapter': 'CONTROLLER',
+    'Agent': 'CONTROLLER',
+    'Path': 'CONTROLLER',
+    'Axes': 'LINEAR'
+}
+
+# Rows read ahead per batch so new lookup keys are resolved with one round trip per table
+LOOKUP_BATCH_SIZE = 50000
+
+def upsert_machines(cur, machine_names):
+    """Get or create machines in one statement, returning {csv machine name: id}"""
+    db_names = {name: MACHINE_NAME_MAPPING.get(name, name) for name in machine_names}
+    # Rows go in conflict-key order so concurrent loaders lock existing rows in the same order
+    rows = execute_values(cur, """
+        INSERT INTO machines (name, model, series, status) 
+        VALUES %s
+        ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id, name
+    """, [(name, name.split('-')[0], 'VTC', 'ACTIVE') for name in sorted(set(db_names.values()))],
+        page_size=len(db_names), fetch=True)
     
-    db_machine_name = machine_mapping.get(machine_name, machine_name)
+    ids = {name: machine_id for machine_id, name in rows}
+    return {name: ids[db_name] for name, db_name in db_names.items()}
+
+def upsert_components(cur, components):
+    """Get or create components in one statement from {(machine_id, component_id): (type, name)}"""
+    # Sorted by conflict key, as in upsert_machines, so concurrent loaders cannot deadlock
+    rows = execute_values(cur, """
+        INSERT INTO components (machine_id, component_id, component_type, component_name) 
+        VALUES %s
+        ON CONFLICT (machine_id, component_id) DO UPDATE SET component_name = EXCLUDED.component_name
+        RETURNING id, machine_id, component_id
+    """, [
+        (machine_id, component_id, COMPONENT_TYPE_MAPPING.get(component_type, 'CONTROLLER'), component_name)
+        for (machine_id, component_id), (component_type, component_name) in sorted(components.items())
+    ], page_size=len(components), fetch=True)
     
-    cur.execute("SELECT id FROM machines WHERE name = %s", (db_machine_name,))
-    result = cur.fetchone()
+    return {(machine_id, component_id): db_id for db_id, machine_id, component_id in rows}
+
+def upsert_data_streams(cur, streams):
+    """Get or create data streams in one statement from {(machine_id, data_type)}"""
+    # data_streams has no unique key to conflict on, so existing streams are matched explicitly;
+    # the advisory lock keeps concurrent loaders from creating the same stream twice
+    cur.execute("SELECT pg_advisory_lock(hashtext('data_streams'))")
+    try:
+        rows = execute_values(cur, """
+            WITH wanted (machine_id, data_type, stream_type) AS (VALUES %s),
+            existing AS (
+                SELECT min(ds.id) AS id, w.machine_id, w.data_type
+                FROM wanted w
+                JOIN data_streams ds
+                  ON ds.machine_id = w.machine_id AND ds.stream_type = w.stream_type::stream_type_enum
+                GROUP BY w.machine_id, w.data_type
+            ),
+            inserted AS (
+                INSERT INTO data_streams (machine_id, stream_type, instance_id, creation_time)
+                SELECT w.machine_id, w.stream_type::stream_type_enum,
+                       lower(w.stream_type) || '_stream_' || w.machine_id, LOCALTIMESTAMP
+                FROM wanted w
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM existing e WHERE e.machine_id = w.machine_id AND e.data_type = w.data_type
+                )
+                RETURNING id, machine_id, stream_type
+            )
+            SELECT e.id, e.machine_id, e.data_type FROM existing e
+            UNION ALL
+            SELECT i.id, i.machine_id, w.data_type
+            FROM inserted i
+            JOIN wanted w ON w.machine_id = i.machine_id AND w.stream_type::stream_type_enum = i.stream_type
+        """, [
+            (machine_id, data_type, 'SAMPLE' if data_type == 'sample' else 'CURRENT')
+            for machine_id, data_type in streams
+        ], page_size=len(streams), fetch=True)
+    finally:
+        cur.execute("SELECT pg_advisory_unlock(hashtext('data_streams'))")
     
-    if result:
-        return result[0]
-    else:
-        print(f"Creating new machine: {db_machine_name}")
-        cur.execute("""
-            INSERT INTO machines (name, model, series, status) 
-            VALUES (%s, %s, %s, %s) RETURNING id
-        """, (db_machine_name, db_machine_name.split('-')[0], 'VTC', 'ACTIVE'))
-        return cur.fetchone()[0]
-
-def get_or_create_component(cur, machine_id, component_id, component_type, component_name):
-    """Get component ID, create if doesn't exist"""
-    type_mapping = {
-        'Linear': 'LINEAR',
-        'Rotary': 'ROTARY', 
-        'Controller': 'CONTROLLER',
-        'Adapter': 'CONTROLLER',
-        'Agent': 'CONTROLLER',
-        'Path': 'CONTROLLER',
-        'Axes': 'LINEAR'
-    }
+    return {(machine_id, data_type): stream_id for stream_id, machine_id, data_type in rows}
+
+def resolve_lookups(cur, rows, columns, machine_lookup, component_lookup, stream_lookup):
+    """Add ids for every machine/component/stream in a batch of rows not already in the lookups
     
-    db_component_type = type_mapping.get(component_type, 'CONTROLLER')
+    Components and streams are nested per machine id ({machine_id: {key: id}}) so the per-row
+    lookups in the loaders index by plain strings instead of building a tuple key for every row.
+    """
+    machine_name_col, component_id_col, data_type_col, component_type_col, component_name_col = columns
     
-    cur.execute("""
-        SELECT id FROM components 
-        WHERE machine_id = %s AND component_id = %s
-    """, (machine_id, component_id))
-    result = cur.fetchone()
+    new_machines = {row[machine_name_col] for row in rows} - machine_lookup.keys()
+    if new_machines:
+        machine_lookup.update(upsert_machines(cur, new_machines))
+        for machine_id in machine_lookup.values():
+            component_lookup.setdefault(machine_id, {})
+            stream_lookup.setdefault(machine_id, {})
     
-    if result:
-        return result[0]
-    else:
-        cur.execute("""
-            INSERT INTO components (machine_id, component_id, component_type, component_name) 
-            VALUES (%s, %s, %s, %s) RETURNING id
-        """, (machine_id, component_id, db_component_type, component_name))
-        return cur.fetchone()[0]
-
-def get_or_create_data_stream(cur, machine_id, data_type):
-    """Get or create data stream for machine and type"""
-    stream_type = 'SAMPLE' if data_type == 'sample' else 'CURRENT'
+    new_components = {}
+    new_streams = set()
+    for row in rows:
+        machine_id = machine_lookup[row[machine_name_col]]
+        component_id = row[component_id_col]
+        if component_id not in component_lookup[machine_id]:
+            new_components[(machine_id, component_id)] = (row[component_type_col], row[component_name_col])
+        data_type = row[data_type_col]
+        if data_type not in stream_lookup[machine_id]:
+            new_streams.add((machine_id, data_type))
     
+    if new_components:
+        for (machine_id, component_id), db_id in upsert_components(cur, new_components).items():
+            component_lookup[machine_id][component_id] = db_id
+    if new_streams:
+        for (machine_id, data_type), stream_id in upsert_data_streams(cur, new_streams).items():
+            stream_lookup[machine_id][data_type] = stream_id
+
+def drop_secondary_indexes(cur, table):
+    """Drop a table's non-unique indexes, returning the DDL to recreate them"""
     cur.execute("""
-        SELECT id FROM data_streams 
-        WHERE machine_id = %s AND stream_type = %s
-    """, (machine_id, stream_type))
-    result = cur.fetchone()
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = %s::regclass AND NOT i.indisprimary AND NOT i.indisunique
+    """, (table,))
+    indexes = cur.fetchall()
     
-    if result:
-        return result[0]
-    else:
-        cur.execute("""
-            INSERT INTO data_streams (machine_id, stream_type, instance_id, creation_time) 
-            VALUES (%s, %s, %s, %s) RETURNING id
-        """, (machine_id, stream_type, f"{stream_type.lower()}_stream_{machine_id}", datetime.now()))
-        return cur.fetchone()[0]
+    for index_name, _ in indexes:
+        cur.execute(f"DROP INDEX {index_name}")
+    return [index_ddl for _, index_ddl in indexes]
 
-def load_samples_efficient(cur, csv_file_path):
+def read_csv_rows(csv_file_path, columns):
+    """Yield tuples of the given columns from a CSV file, as strings ('' for empty fields)"""
+    if pacsv is None:
+        with open(csv_file_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            pick = itemgetter(*(header.index(column) for column in columns))
+            for row in reader:
+                yield pick(row)
+        return
+    
+    # PyArrow parses whole blocks in C; columns stay strings so values match the csv module's.
+    # Quoted values may span lines (e.g. free-text events), as the csv module allows
+    reader = pacsv.open_csv(
+        csv_file_path,
+        read_options=pacsv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=columns,
+            column_types={column: pa.string() for column in columns},
+            strings_can_be_null=False
+        )
+    )
+    for batch in reader:
+        yield from zip(*(batch.column(column).to_pylist() for column in columns))
+
+@contextmanager
+def copy_stream(cur, copy_sql):
+    """Run a binary COPY FROM STDIN in a background thread, yielding the write end of the pipe it reads from"""
+    read_fd, write_fd = os.pipe()
+    errors = []
+    
+    def run_copy():
+        with os.fdopen(read_fd, 'rb') as pipe_in:
+            try:
+                cur.copy_expert(copy_sql, pipe_in, size=PIPE_BUFFER_SIZE)
+            except Exception as e:
+                errors.append(e)
+    
+    copy_thread = threading.Thread(target=run_copy, daemon=True)
+    copy_thread.start()
+    try:
+        with os.fdopen(write_fd, 'wb', buffering=PIPE_BUFFER_SIZE) as pipe_out:
+            pipe_out.write(PGCOPY_HEADER)
+            yield pipe_out
+            pipe_out.write(PGCOPY_TRAILER)
+    except BrokenPipeError:
+        # COPY stopped reading; its own error is raised below
+        pass
+    finally:
+        copy_thread.join()
+    
+    if errors:
+        raise errors[0]
+
+def load_samples_efficient(cur, csv_file_path, replace=False):
     """Load samples data efficiently using COPY FROM STDIN"""
     print(f"Loading samples from {csv_file_path}...")
     
-    # First, build lookup tables to avoid repeated queries
+    # New lookup keys are resolved per batch of rows, in the same pass as the COPY.
+    # The COPY holds the main connection while rows stream, so lookups use their own connection
     machine_lookup = {}
     component_lookup = {}
     stream_lookup = {}
+    lookup_conn = psycopg2.connect(**DB_PARAMS)
+    lookup_conn.autocommit = True
+    lookup_cur = lookup_conn.cursor()
     
-    # Process file in chunks to build lookup tables
-    chunk_size = 50000
-    total_processed = 0
+    print("Loading data into database...")
     
-    with open(csv_file_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    try:
+        if replace:
+            # Emptied in the same transaction as the load, so with wal_level = minimal the
+            # INSERT below skips WAL for samples entirely
+            cur.execute("TRUNCATE samples RESTART IDENTITY")
         
-        # Build lookup tables first
-        print("Building lookup tables...")
-        for row in reader:
-            machine_name = row['machine_name']
-            component_id = row['component_id']
-            data_type = row['data_type']
-            
-            if machine_name not in machine_lookup:
-                machine_lookup[machine_name] = get_machine_id_by_name(cur, machine_name)
+        cur.execute("DROP TABLE IF EXISTS samples_staging")
+        cur.execute(SAMPLES_STAGING_SQL)
+        
+        with copy_stream(cur, """
+            COPY samples_staging (data_stream_id, component_id, data_item_id, sample_name, 
+                                  timestamp, sequence, value, sub_type, composition_id) 
+            FROM STDIN WITH (FORMAT BINARY)
+        """) as pipe_out:
+            # Rows are tuples of just these columns, indexed by position
+            reader = read_csv_rows(csv_file_path, [
+                'machine_name', 'component_id', 'data_type', 'component_type', 'component_name',
+                'sample_name', 'timestamp', 'sequence', 'value', 'sub_type'
+            ])
+            (MACHINE_NAME, COMPONENT_ID, DATA_TYPE, COMPONENT_TYPE, COMPONENT_NAME,
+             SAMPLE_NAME, TIMESTAMP, SEQUENCE, VALUE, SUB_TYPE) = range(10)
             
-            machine_id = machine_lookup[machine_name]
-            lookup_key = (machine_id, component_id)
+            # Rows are packed straight into the pipe while PostgreSQL consumes them
+            write = pipe_out.write
+            field_count = struct.pack('!h', 9)
+            numeric_match = NUMERIC_RE.match
             
-            if lookup_key not in component_lookup:
-                component_lookup[lookup_key] = get_or_create_component(
-                    cur, machine_id, component_id, 
-                    row['component_type'], row['component_name']
-                )
+            row_count = 0
+            non_numeric_count = 0
+            progress_interval = 100000
             
-            stream_key = (machine_id, data_type)
-            if stream_key not in stream_lookup:
-                stream_lookup[stream_key] = get_or_create_data_stream(cur, machine_id, data_type)
+            lookup_columns = (MACHINE_NAME, COMPONENT_ID, DATA_TYPE, COMPONENT_TYPE, COMPONENT_NAME)
             
-            total_processed += 1
-            if total_processed % chunk_size == 0:
-                print(f"Built lookups for {total_processed:,} records...")
-                cur.connection.commit()
-    
-    print(f"Lookup tables built for {total_processed:,} records")
-    
-    # Now load data efficiently
-    print("Loading data into database...")
-    
-    # Reset file pointer
-    with open(csv_file_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        
-        # Use COPY FROM STDIN for maximum efficiency
-        samples_buf = StringIO()
-        samples_writer = csv.writer(samples_buf)
-        
-        # Write header for COPY
-        samples_writer.writerow([
-            'data_stream_id', 'component_id', 'data_item_id', 'sample_name', 
-            'timestamp', 'sequence', 'value', 'sub_type', 'composition_id'
-        ])
-        
-        batch_count = 0
-        batch_size = 100000
-        
-        for row in reader:
-            try:
-                machine_name = row['machine_name']
-                component_id = row['component_id']
-                data_type = row['data_type']
-                
-                machine_id = machine_lookup[machine_name]
-                component_db_id = component_lookup[(machine_id, component_id)]
-                data_stream_id = stream_lookup[(machine_id, data_type)]
-                
-                # Parse timestamp
-                timestamp = datetime.fromisoformat(row['timestamp'].replace('Z', '+00:00'))
-                
-                # Parse sequence
-                sequence = int(row.get('sequence', 0))
-                
-                # Parse value
-                value = row.get('value', '').strip()
-                if value == '':
-                    value = None
-                else:
-                    try:
-                        value = float(value)
-                    except ValueError:
-                        value = value
-                
-                samples_writer.writerow([
-                    data_stream_id, component_db_id, row['sample_name'], row['sample_name'],
-                    timestamp, sequence, value, row.get('sub_type', ''), ''
-                ])
+            for rows in iter(lambda: list(islice(reader, LOOKUP_BATCH_SIZE)), []):
+                resolve_lookups(lookup_cur, rows, lookup_columns, machine_lookup, component_lookup, stream_lookup)
                 
-                batch_count += 1
-                
-                # Write in batches
-                if batch_count % batch_size == 0:
-                    samples_buf.seek(0)
-                    cur.copy_expert("""
-                        COPY samples (data_stream_id, component_id, data_item_id, sample_name, 
-                                     timestamp, sequence, value, sub_type, composition_id) 
-                        FROM STDIN CSV HEADER
-                    """, samples_buf)
-                    print(f"Loaded batch of {batch_count:,} samples...")
+                for row in rows:
+                    machine_id = machine_lookup[row[MACHINE_NAME]]
+                    component_db_id = component_lookup[machine_id][row[COMPONENT_ID]]
+                    data_stream_id = stream_lookup[machine_id][row[DATA_TYPE]]
                     
-                    # Clear buffer for next batch
-                    samples_buf = StringIO()
-                    samples_writer = csv.writer(samples_buf)
-                    samples_writer.writerow([
-                        'data_stream_id', 'component_id', 'data_item_id', 'sample_name', 
-                        'timestamp', 'sequence', 'value', 'sub_type', 'composition_id'
-                    ])
+                    try:
+                        # Parse sequence
+                        sequence = int(row[SEQUENCE])
+                        
+                        # Parse value; non-numeric readings (e.g. UNAVAILABLE) cannot go into the
+                        # DECIMAL column and are stored as NULL, without raising per row
+                        value = row[VALUE].strip()
+                        if value and numeric_match(value):
+                            value_field = FLOAT8_FIELD.pack(8, float(value))
+                        else:
+                            if value:
+                                non_numeric_count += 1
+                            value_field = PGCOPY_NULL
+                        
+                        sample_name = pack_text(row[SAMPLE_NAME])
+                        sub_type = row[SUB_TYPE]
+                        record = b''.join((
+                            field_count, INT4_FIELD.pack(4, data_stream_id), INT4_FIELD.pack(4, component_db_id),
+                            sample_name, sample_name, pack_timestamp(row[TIMESTAMP]), INT4_FIELD.pack(4, sequence),
+                            value_field, pack_text(sub_type) if sub_type else PGCOPY_NULL, PGCOPY_NULL
+                        ))
+                    except Exception as e:
+                        print(f"Error processing sample row: {e}")
+                        continue
                     
-                    cur.connection.commit()
+                    # Outside the per-row handler: a broken pipe means the COPY itself
+                    # failed, and copy_stream raises its error instead of skipping rows
+                    write(record)
                     
-            except Exception as e:
-                print(f"Error processing sample row: {e}")
-                continue
+                    row_count += 1
+                    if row_count % progress_interval == 0:
+                        print(f"Streamed {row_count:,} samples...")
         
-        # Load remaining data
-        if batch_count % batch_size != 0:
-            samples_buf.seek(0)
-            cur.copy_expert("""
-                COPY samples (data_stream_id, component_id, data_item_id, sample_name, 
-                             timestamp, sequence, value, sub_type, composition_id) 
-                FROM STDIN CSV HEADER
-            """, samples_buf)
-            print(f"Loaded final batch of {batch_count % batch_size:,} samples...")
-        
-        cur.connection.commit()
-        print(f"Successfully loaded samples data")
+        # Bulk-insert without maintaining secondary indexes, then rebuild each one with a single sort
+        index_ddls = drop_secondary_indexes(cur, 'samples')
+        cur.execute("""
+            INSERT INTO samples (data_stream_id, component_id, data_item_id, sample_name,
+                                 timestamp, sequence, value, sub_type, composition_id)
+            SELECT data_stream_id, component_id, data_item_id, sample_name,
+                   timestamp, sequence, value, sub_type::sub_type_enum, composition_id
+            FROM samples_staging
+        """)
+        for index_ddl in index_ddls:
+            cur.execute(index_ddl)
+        cur.execute("DROP TABLE samples_staging")
+    finally:
+        lookup_cur.close()
+        lookup_conn.close()
+    
+    cur.connection.commit()
+    if non_numeric_count:
+        print(f"Stored {non_numeric_count:,} non-numeric sample values as NULL")
+    print(f"Successfully loaded {row_count:,} samples")
 
-def load_events_efficient(cur, csv_file_path):
+def load_events_efficient(cur, csv_file_path, replace=False):
     """Load events data efficiently"""
     print(f"Loading events from {csv_file_path}...")
     
-    # Build lookup tables
+    # New lookup keys are resolved per batch of rows, in the same pass as the COPY.
+    # The COPY holds the main connection while rows stream, so lookups use their own connection
     machine_lookup = {}
     component_lookup = {}
     stream_lookup = {}
+    lookup_conn = psycopg2.connect(**DB_PARAMS)
+    lookup_conn.autocommit = True
+    lookup_cur = lookup_conn.cursor()
     
-    # First pass: build lookups
-    print("Building lookup tables...")
-    with open(csv_file_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            machine_name = row['machine_name']
-            component_id = row['component_id']
-            data_type = row['data_type']
-            
-            if machine_name not in machine_lookup:
-                machine_lookup[machine_name] = get_machine_id_by_name(cur, machine_name)
-            
-            machine_id = machine_lookup[machine_name]
-            lookup_key = (machine_id, component_id)
-            
-            if lookup_key not in component_lookup:
-                component_lookup[lookup_key] = get_or_create_component(
-                    cur, machine_id, component_id, 
-                    row['component_type'], row['component_name']
-                )
-            
-            stream_key = (machine_id, data_type)
-            if stream_key not in stream_lookup:
-                stream_lookup[stream_key] = get_or_create_data_stream(cur, machine_id, data_type)
-    
-    cur.connection.commit()
-    print("Lookup tables built")
-    
-    # Second pass: load data
     print("Loading events data...")
     
-    with open(csv_file_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        
-        events_buf = StringIO()
-        events_writer = csv.writer(events_buf)
-        
-        # Write header
-        events_writer.writerow([
-            'data_stream_id', 'component_id', 'data_item_id', 'event_name',
-            'timestamp', 'sequence', 'value', 'event_type'
-        ])
+    try:
+        if replace:
+            # Emptied in the same transaction as the load, so with wal_level = minimal the
+            # INSERT below skips WAL for events entirely
+            cur.execute("TRUNCATE events RESTART IDENTITY")
         
-        batch_count = 0
-        batch_size = 100000
+        cur.execute("DROP TABLE IF EXISTS events_staging")
+        cur.execute(EVENTS_STAGING_SQL)
         
-        for row in reader:
-            try:
-                machine_name = row['machine_name']
-                component_id = row['component_id']
-                data_type = row['data_type']
-                
-                machine_id = machine_lookup[machine_name]
-                component_db_id = component_lookup[(machine_id, component_id)]
-                data_stream_id = stream_lookup[(machine_id, data_type)]
-                
-                # Parse timestamp
-                timestamp = datetime.fromisoformat(row['timestamp'].replace('Z', '+00:00'))
-                
-                # Parse sequence
-                sequence = int(row.get('sequence', 0))
-                
-                # Determine event type
-                event_name = row['event_name']
-                if 'program' in event_name.lower():
-                    event_type = 'PROGRAM'
-                elif 'door' in event_name.lower() or 'safety' in event_name.lower():
-                    event_type = 'SAFETY'
-                elif 'control' in event_name.lower():
-                    event_type = 'CONTROL'
-                else:
-                    event_type = 'EXECUTION'
-                
-                events_writer.writerow([
-                    data_stream_id, component_db_id, event_name, event_name,
-                    timestamp, sequence, row.get('value', ''), event_type
-                ])
-                
-                batch_count += 1
+        with copy_stream(cur, """
+            COPY events_staging (data_stream_id, component_id, data_item_id, event_name,
+                                 timestamp, sequence, value, event_type)
+            FROM STDIN WITH (FORMAT BINARY)
+        """) as pipe_out:
+            # Rows are tuples of just these columns, indexed by position
+            reader = read_csv_rows(csv_file_path, [
+                'machine_name', 'component_id', 'data_type', 'component_type', 'component_name',
+                'event_name', 'timestamp', 'sequence', 'value'
+            ])
+            (MACHINE_NAME, COMPONENT_ID, DATA_TYPE, COMPONENT_TYPE, COMPONENT_NAME,
+             EVENT_NAME, TIMESTAMP, SEQUENCE, VALUE) = range(9)
+            
+            # Rows are packed straight into the pipe while PostgreSQL consumes them
+            write = pipe_out.write
+            field_count = struct.pack('!h', 8)
+            
+            row_count = 0
+            progress_interval = 100000
+            
+            lookup_columns = (MACHINE_NAME, COMPONENT_ID, DATA_TYPE, COMPONENT_TYPE, COMPONENT_NAME)
+            
+            for rows in iter(lambda: list(islice(reader, LOOKUP_BATCH_SIZE)), []):
+                resolve_lookups(lookup_cur, rows, lookup_columns, machine_lookup, component_lookup, stream_lookup)
                 
-                # Write in batches
-                if batch_count % batch_size == 0:
-                    events_buf.seek(0)
-                    cur.copy_expert("""
-                        COPY events (data_stream_id, component_id, data_item_id, event_name,
-                                    timestamp, sequence, value, event_type)
-                        FROM STDIN CSV HEADER
-                    """, events_buf)
-                    print(f"Loaded batch of {batch_count:,} events...")
+                for row in rows:
+                    machine_id = machine_lookup[row[MACHINE_NAME]]
+                    component_db_id = component_lookup[machine_id][row[COMPONENT_ID]]
+                    data_stream_id = stream_lookup[machine_id][row[DATA_TYPE]]
                     
-                    # Clear buffer
-                    events_buf = StringIO()
-                    events_writer = csv.writer(events_buf)
-                    events_writer.writerow([
-                        'data_stream_id', 'component_id', 'data_item_id', 'event_name',
-                        'timestamp', 'sequence', 'value', 'event_type'
-                    ])
+                    try:
+                        # Parse sequence
+                        sequence = int(row[SEQUENCE])
+                        
+                        event_name = row[EVENT_NAME]
+                        event_name_field = pack_text(event_name)
+                        value = row[VALUE]
+                        record = b''.join((
+                            field_count, INT4_FIELD.pack(4, data_stream_id), INT4_FIELD.pack(4, component_db_id),
+                            event_name_field, event_name_field, pack_timestamp(row[TIMESTAMP]),
+                            INT4_FIELD.pack(4, sequence), pack_text(value) if value else PGCOPY_NULL,
+                            event_type_field(event_name)
+                        ))
+                    except Exception as e:
+                        print(f"Error processing event row: {e}")
+                        continue
                     
-                    cur.connection.commit()
+                    # A broken pipe means the COPY failed; let copy_stream raise its error
+                    write(record)
                     
-            except Exception as e:
-                print(f"Error processing event row: {e}")
-                continue
+                    row_count += 1
+                    if row_count % progress_interval == 0:
+                        print(f"Streamed {row_count:,} events...")
         
-        # Load remaining data
-        if batch_count % batch_size != 0:
-            events_buf.seek(0)
-            cur.copy_expert("""
-                COPY events (data_stream_id, component_id, data_item_id, event_name,
-                            timestamp, sequence, value, event_type)
-                FROM STDIN CSV HEADER
-            """, events_buf)
-            print(f"Loaded final batch of {batch_count % batch_size:,} events...")
+        # Bulk-insert without maintaining secondary indexes, then rebuild each one with a single sort
+        index_ddls = drop_secondary_indexes(cur, 'events')
+        cur.execute("""
+            INSERT INTO events (data_stream_id, component_id, data_item_id, event_name,
+                                timestamp, sequence, value, event_type)
+            SELECT data_stream_id, component_id, data_item_id, event_name,
+                   timestamp, sequence, value, event_type::event_type_enum
+            FROM events_staging
+        """)
+        for index_ddl in index_ddls:
+            cur.execute(index_ddl)
+        cur.execute("DROP TABLE events_staging")
+    finally:
+        lookup_cur.close()
+        lookup_conn.close()
+    
+    cur.connection.commit()
+    print(f"Successfully loaded {row_count:,} events")
+
+LOADERS = {
+    'samples': load_samples_efficient,
+    'events': load_events_efficient,
+}
+
+def run_loader(table, csv_file_path, replace=False):
+    """Load one CSV file on its own connection; runs in a worker process"""
+    conn = psycopg2.connect(**DB_PARAMS)
+    cur = conn.cursor()
+    
+    try:
+        # Disable triggers for faster loading
+        cur.execute("SET session_replication_role = replica;")
         
-        cur.connection.commit()
-        print(f"Successfully loaded events data")
+        for setting in LOAD_SESSION_SETTINGS:
+            cur.execute(setting)
+        
+        LOADERS[table](cur, csv_file_path, replace=replace)
+        
+        # Re-enable triggers
+        cur.execute("SET session_replication_role = DEFAULT;")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
 
 def main():
     parser = argparse.ArgumentParser(description='Efficiently load processed CSV data into Mazak database')
@@ -361,6 +565,8 @@ def main():
     parser.add_argument('--events', action='store_true', help='Load events data')
     parser.add_argument('--all', action='store_true', help='Load all data types')
     parser.add_argument('--data-dir', default='src/data/processed', help='Directory containing CSV files')
+    parser.add_argument('--replace', action='store_true',
+                        help='Replace existing rows of each loaded table instead of appending')
     
     args = parser.parse_args()
     
@@ -368,40 +574,35 @@ def main():
         print("Please specify which data to load: --samples, --events, or --all")
         return
     
+    jobs = []
+    for table, selected in (('samples', args.samples), ('events', args.events)):
+        if not (args.all or selected):
+            continue
+        csv_file_path = os.path.join(args.data_dir, f'{table}.csv')
+        if os.path.exists(csv_file_path):
+            jobs.append((table, csv_file_path))
+        else:
+            print(f"{table.capitalize()} file not found: {csv_file_path}")
+    
     conn = None
     cur = None
     
     try:
-        # Connect to database
-        print("Connecting to database...")
-        conn = psycopg2.connect(**DB_PARAMS)
-        cur = conn.cursor()
-        
-        # Disable triggers for faster loading
-        cur.execute("SET session_replication_role = replica;")
-        
-        if args.all or args.samples:
-            samples_file = os.path.join(args.data_dir, 'samples.csv')
-            if os.path.exists(samples_file):
-                load_samples_efficient(cur, samples_file)
-            else:
-                print(f"Samples file not found: {samples_file}")
-        
-        if args.all or args.events:
-            events_file = os.path.join(args.data_dir, 'events.csv')
-            if os.path.exists(events_file):
-                load_events_efficient(cur, events_file)
-            else:
-                print(f"Events file not found: {events_file}")
-        
-        # Re-enable triggers
-        cur.execute("SET session_replication_role = DEFAULT;")
+        # Each table loads on its own connection in its own process, so the files load concurrently
+        with ProcessPoolExecutor(max_workers=max(1, len(jobs))) as executor:
+            futures = {
+                executor.submit(run_loader, table, csv_file_path, args.replace): table
+                for table, csv_file_path in jobs
+            }
+            for future in as_completed(futures):
+                future.result()
+                print(f"Finished loading {futures[future]}")
         
-        # Final commit
-        conn.commit()
         print("\nData loading completed successfully!")
         
         # Show summary
+        conn = psycopg2.connect(**DB_PARAMS)
+        cur = conn.cursor()
         cur.execute("SELECT COUNT(*) FROM samples")
         sample_count = cur.fetchone()[0]
         cur.execute("SELECT COUNT(*) FROM events")
@@ -416,8 +617,6 @@ def main():
         
     except Exception as e:
         print(f"Error: {e}")
-        if conn:
-            conn.rollback()
         raise
     finally:
         if cur:
@@ -427,5 +626,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-
@@ -5,13 +5,25 @@ This script loads data from the processed CSV files into the new database schema
 """
 
 import os
+import io
+import re
 import csv
+import math
+import struct
 import psycopg2
-from io import StringIO
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing.util
 import sys
 
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:
+    pacsv = None
+
 # Database connection parameters
 DB_PARAMS = {
     'host': '100.83.52.87',
@@ -21,320 +33,674 @@ DB_PARAMS = {
     'password': 'tableplus',
 }
 
-def get_machine_id_by_name(cur, machine_name):
-    """Get machine ID by name, create if doesn't exist"""
-    # Map CSV machine names to our database machine names
-    machine_mapping = {
-        'mazak_1_vtc_200': 'VTC-200-001',
-        'mazak_2_vtc_300': 'VTC-300-001', 
-        'mazak_3_350msy': '350MSY-001',
-        'mazak_4_vtc_300c': 'VTC-300C-001'
-    }
-    
-    db_machine_name = machine_mapping.get(machine_name, machine_name)
-    
-    cur.execute("SELECT id FROM machines WHERE name = %s", (db_machine_name,))
-    result = cur.fetchone()
-    
-    if result:
-        return result[0]
-    else:
-        # Create new machine if it doesn't exist
-        print(f"Creating new machine: {db_machine_name}")
-        cur.execute("""
-            INSERT INTO machines (name, model, series, status) 
-            VALUES (%s, %s, %s, %s) RETURNING id
-        """, (db_machine_name, db_machine_name.split('-')[0], 'VTC', 'ACTIVE'))
-        return cur.fetchone()[0]
-
-def get_or_create_component(cur, machine_id, component_id, component_type, component_name):
-    """Get component ID, create if doesn't exist"""
-    # Map component types to our enum values
-    type_mapping = {
-        'Linear': 'LINEAR',
-        'Rotary': 'ROTARY', 
-        'Controller': 'CONTROLLER',
-        'Adapter': 'CONTROLLER',
-        'Agent': 'CONTROLLER',
-        'Path': 'CONTROLLER',
-        'Axes': 'LINEAR'
-    }
-    
-    db_component_type = type_mapping.get(component_type, 'CONTROLLER')
-    
-    cur.execute("""
-        SELECT id FROM components 
-        WHERE machine_id = %s AND component_id = %s
-    """, (machine_id, component_id))
-    result = cur.fetchone()
-    
-    if result:
-        return result[0]
-    else:
-        # Create new component
-        cur.execute("""
-            INSERT INTO components (machine_id, component_id, component_type, component_name) 
-            VALUES (%s, %s, %s, %s) RETURNING id
-        """, (machine_id, component_id, db_component_type, component_name))
-        return cur.fetchone()[0]
-
-def get_or_create_data_stream(cur, machine_id, data_type):
-    """Get or create data stream for machine and type"""
-    stream_type = 'SAMPLE' if data_type == 'sample' else 'CURRENT'
-    
-    cur.execute("""
-        SELECT id FROM data_streams 
-        WHERE machine_id = %s AND stream_type = %s
-    """, (machine_id, stream_type))
-    result = cur.fetchone()
-    
-    if result:
-        return result[0]
-    else:
-        # Create new data stream
+# Session settings for bulk loading. wal_compression and max_wal_size would
+# help too, but need superuser rights and a server reload respectively.
+LOAD_SESSION_SETTINGS = (
+    "SET synchronous_commit = off",
+    "SET maintenance_work_mem = '1GB'",
+    "SET temp_buffers = '512MB'",
+    "SET client_min_messages = warning",
+)
+
+# Bytes handed to COPY per read() call
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Bytes PyArrow parses per CSV block
+CSV_BLOCK_SIZE = 1 << 22
+
+# Read buffer for the input CSVs, so sequential reads take fewer, larger syscalls
+READ_BUFFER_SIZE = 1 << 20
+
+# Binary COPY framing: signature, flags and header extension length up front,
+# a -1 field count as trailer, and a -1 length for NULL fields
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('!h', -1)
+PGCOPY_NULL = struct.pack('!i', -1)
+
+# Binary timestamps are microseconds since the Postgres epoch
+PG_EPOCH = datetime(2000, 1, 1)
+PG_EPOCH_ORDINAL = PG_EPOCH.toordinal()
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# ISO-8601 timestamps as written by the processing step; TIMESTAMP columns
+# ignore the offset, so it is matched but not applied
+TIMESTAMP_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6})\d*)?(?:Z|[+-]\d{2}:?\d{2})?$')
+
+FIELD_COUNT = struct.Struct('!h')
+FIELD_LENGTH = struct.Struct('!i')
+INT4_FIELD = struct.Struct('!ii')
+INT8_FIELD = struct.Struct('!iq')
+NUMERIC_HEADER = struct.Struct('!ihhhh')
+
+# Scale of samples.value (DECIMAL(15,6))
+NUMERIC_SCALE = 6
+
+# Map CSV machine names to our database machine names
+MACHINE_MAPPING = {
+    'mazak_1_vtc_200': 'VTC-200-001',
+    'mazak_2_vtc_300': 'VTC-300-001', 
+    'mazak_3_350msy': '350MSY-001',
+    'mazak_4_vtc_300c': 'VTC-300C-001'
+}
+
+# Map component types to our enum values
+COMPONENT_TYPE_MAPPING = {
+    'Linear': 'LINEAR',
+    'Rotary': 'ROTARY', 
+    'Controller': 'CONTROLLER',
+    'Adapter': 'CONTROLLER',
+    'Agent': 'CONTROLLER',
+    'Path': 'CONTROLLER',
+    'Axes': 'LINEAR'
+}
+
+CATEGORY_MAPPING = {
+    'TEMPERATURE': 'TEMPERATURE',
+    'LOAD': 'LOAD',
+    'LOGIC_PROGRAM': 'LOGIC_PROGRAM',
+    'COMMUNICATIONS': 'COMMUNICATIONS'
+}
+
+# Event types by event name keyword, checked in order
+EVENT_TYPE_RULES = (
+    ('program', 'PROGRAM'),
+    ('door', 'SAFETY'),
+    ('safety', 'SAFETY'),
+    ('control', 'CONTROL'),
+)
+
+# Condition states by state keyword, checked in order
+CONDITION_STATE_RULES = (
+    ('warning', 'WARNING'),
+    ('fault', 'FAULT'),
+)
+
+SAMPLE_ROW = FIELD_COUNT.pack(9)
+EVENT_ROW = FIELD_COUNT.pack(8)
+CONDITION_ROW = FIELD_COUNT.pack(9)
+
+def pack_text(value):
+    """Encode a text field; empty strings go in as NULL, as they did with CSV COPY"""
+    if not value:
+        return PGCOPY_NULL
+    data = value.encode('utf-8')
+    return FIELD_LENGTH.pack(len(data)) + data
+
+@lru_cache(maxsize=4096)
+def days_since_pg_epoch(year, month, day):
+    """Days between the Postgres epoch and a date; dates repeat across rows, so cached"""
+    return date(int(year), int(month), int(day)).toordinal() - PG_EPOCH_ORDINAL
+
+def pack_timestamp(text):
+    """Encode an ISO-8601 string for a TIMESTAMP column without building a datetime"""
+    match = TIMESTAMP_RE.match(text)
+    if match is None:
+        # Unusual formats take the slow path; the offset is dropped, like text input
+        timestamp = datetime.fromisoformat(text.replace('Z', '+00:00')).replace(tzinfo=None)
+        return INT8_FIELD.pack(8, (timestamp - PG_EPOCH) // ONE_MICROSECOND)
+    
+    year, month, day, hour, minute, second, fraction = match.groups()
+    seconds = days_since_pg_epoch(year, month, day) * 86400 + int(hour) * 3600 + int(minute) * 60 + int(second)
+    micros = int(fraction.ljust(6, '0')) if fraction else 0
+    return INT8_FIELD.pack(8, seconds * 1000000 + micros)
+
+def pack_numeric(value):
+    """Encode a float as a binary NUMERIC with NUMERIC_SCALE decimal places"""
+    text = f"{value:.{NUMERIC_SCALE}f}"
+    sign = 0x4000 if text.startswith('-') else 0
+    int_part, frac_part = text.lstrip('-').split('.')
+
+    # NUMERIC stores base-10000 digits, grouped away from the decimal point
+    int_part = int_part.lstrip('0')
+    int_part = int_part.zfill(-(-len(int_part) // 4) * 4)
+    frac_part = frac_part.ljust(-(-len(frac_part) // 4) * 4, '0')
+    digits = [int(int_part[i:i + 4]) for i in range(0, len(int_part), 4)]
+    weight = len(digits) - 1
+    digits += [int(frac_part[i:i + 4]) for i in range(0, len(frac_part), 4)]
+
+    while digits and digits[0] == 0:
+        digits.pop(0)
+        weight -= 1
+    while digits and digits[-1] == 0:
+        digits.pop()
+    if not digits:
+        return NUMERIC_HEADER.pack(8, 0, 0, 0, NUMERIC_SCALE)
+
+    return NUMERIC_HEADER.pack(8 + 2 * len(digits), len(digits), weight, sign, NUMERIC_SCALE) + \
+        struct.pack(f'!{len(digits)}h', *digits)
+
+@lru_cache(maxsize=4096)
+def classify_event(event_name):
+    """Determine event type based on event name; names repeat, so each is classified once"""
+    event_name = event_name.lower()
+    for keyword, event_type in EVENT_TYPE_RULES:
+        if keyword in event_name:
+            return event_type
+    return 'EXECUTION'
+
+@lru_cache(maxsize=4096)
+def classify_state(state_text):
+    """Map a condition state to our enum values; states repeat, so each is mapped once"""
+    if state_text == '#text':
+        return 'NORMAL'
+    state_text = state_text.lower()
+    for keyword, state in CONDITION_STATE_RULES:
+        if keyword in state_text:
+            return state
+    return 'NORMAL'
+
+class Resolver:
+    """Resolve machine, component and data stream ids from in-memory caches.
+
+    The lookup tables are read once up front; rows only hit the database
+    when they reference something that does not exist yet.
+    """
+
+    def __init__(self, cur):
+        self.cur = cur
+
+        # All three lookup tables come back in one round trip
         cur.execute("""
-            INSERT INTO data_streams (machine_id, stream_type, instance_id, creation_time) 
-            VALUES (%s, %s, %s, %s) RETURNING id
-        """, (machine_id, stream_type, f"{stream_type.lower()}_stream_{machine_id}", datetime.now()))
-        return cur.fetchone()[0]
+            SELECT 'machine', id, NULL::integer, name::text FROM machines
+            UNION ALL
+            SELECT 'component', id, machine_id, component_id::text FROM components
+            UNION ALL
+            SELECT 'data_stream', id, machine_id, stream_type::text FROM data_streams
+            ORDER BY 2
+        """)
+        self.machines = {}
+        self.components = {}
+        self.data_streams = {}
+        for kind, id_, machine_id, key in cur.fetchall():
+            if kind == 'machine':
+                self.machines[key] = id_
+            elif kind == 'component':
+                self.components[(machine_id, key)] = id_
+            else:
+                # Keep the oldest stream per machine/type
+                self.data_streams.setdefault((machine_id, key), id_)
 
-def load_samples(cur, csv_file_path):
-    """Load samples data from CSV"""
-    print(f"Loading samples from {csv_file_path}...")
-    
-    # Prepare in-memory CSV for COPY
-    samples_buf = StringIO()
-    samples_writer = csv.writer(samples_buf)
-    
-    # Write header
-    samples_writer.writerow([
-        'data_stream_id', 'component_id', 'data_item_id', 'sample_name', 
-        'timestamp', 'sequence', 'value', 'sub_type', 'composition_id'
-    ])
-    
-    total_rows = 0
-    batch_size = 10000
-    
-    with open(csv_file_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    def get_machine_id_by_name(self, machine_name):
+        """Get machine ID by name, create if doesn't exist"""
+        db_machine_name = MACHINE_MAPPING.get(machine_name, machine_name)
+        
+        try:
+            return self.machines[db_machine_name]
+        except KeyError:
+            # Create new machine if it doesn't exist; another loader may have
+            # just created it, in which case its id comes back instead
+            print(f"Creating new machine: {db_machine_name}")
+            self.cur.execute("""
+                INSERT INTO machines (name, model, series, status) 
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+                RETURNING id
+            """, (db_machine_name, db_machine_name.split('-')[0], 'VTC', 'ACTIVE'))
+            machine_id = self.cur.fetchone()[0]
+            self.machines[db_machine_name] = machine_id
+            return machine_id
+
+    def get_or_create_component(self, machine_id, component_id, component_type, component_name):
+        """Get component ID, create if doesn't exist"""
+        db_component_type = COMPONENT_TYPE_MAPPING.get(component_type, 'CONTROLLER')
+        
+        try:
+            return self.components[(machine_id, component_id)]
+        except KeyError:
+            # Create new component, or pick up one another loader just created
+            self.cur.execute("""
+                INSERT INTO components (machine_id, component_id, component_type, component_name) 
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (machine_id, component_id) DO UPDATE SET component_id = EXCLUDED.component_id
+                RETURNING id
+            """, (machine_id, component_id, db_component_type, component_name))
+            id_ = self.cur.fetchone()[0]
+            self.components[(machine_id, component_id)] = id_
+            return id_
+
+    def get_or_create_data_stream(self, machine_id, data_type):
+        """Get or create data stream for machine and type"""
+        stream_type = 'SAMPLE' if data_type == 'sample' else 'CURRENT'
+        
+        try:
+            return self.data_streams[(machine_id, stream_type)]
+        except KeyError:
+            pass
+        
+        # data_streams has no unique key to conflict on, so concurrent loaders
+        # serialise on an advisory lock and re-check before inserting
+        self.cur.execute("SELECT pg_advisory_lock(hashtext('data_streams'))")
+        try:
+            self.cur.execute("""
+                SELECT id FROM data_streams 
+                WHERE machine_id = %s AND stream_type = %s
+                ORDER BY id LIMIT 1
+            """, (machine_id, stream_type))
+            result = self.cur.fetchone()
+            
+            if result:
+                id_ = result[0]
+            else:
+                # Create new data stream
+                self.cur.execute("""
+                    INSERT INTO data_streams (machine_id, stream_type, instance_id, creation_time) 
+                    VALUES (%s, %s, %s, %s) RETURNING id
+                """, (machine_id, stream_type, f"{stream_type.lower()}_stream_{machine_id}", datetime.now()))
+                id_ = self.cur.fetchone()[0]
+        finally:
+            self.cur.execute("SELECT pg_advisory_unlock(hashtext('data_streams'))")
+        
+        self.data_streams[(machine_id, stream_type)] = id_
+        return id_
+
+class RowIterReader:
+    """File-like object that serves binary COPY rows on demand for copy_expert.
+
+    copy_expert keeps calling read() until it gets an empty result, so rows
+    are pulled from the generator only as COPY consumes them and memory stays
+    bounded by a single chunk instead of the whole file.
+    """
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buf = bytearray(PGCOPY_HEADER)
+        self.done = False
+        self.row_count = 0
+
+    def read(self, size=COPY_CHUNK_SIZE):
+        if size is None or size < 0:
+            size = COPY_CHUNK_SIZE
+
+        buf = self.buf
+        if not self.done:
+            for row in self.rows:
+                buf += row
+                self.row_count += 1
+                if len(buf) >= size:
+                    break
+            else:
+                buf += PGCOPY_TRAILER
+                self.done = True
+
+        # copy_expert sends whatever read() returns, so hand over the whole
+        # buffer rather than slicing off `size` bytes and shifting the rest
+        chunk = bytes(buf)
+        buf.clear()
+        return chunk
+
+def split_byte_ranges(csv_file_path, parts):
+    """Split the rows of a CSV file into up to `parts` byte ranges on line boundaries.
+
+    Rows must not contain quoted newlines, which holds for the processed
+    files: a split could land inside such a value and each range would then
+    be parsed from the middle of a record. Files with multi-line values have
+    to be loaded as a single range (--sample-workers 1).
+    """
+    size = os.path.getsize(csv_file_path)
+    
+    with open(csv_file_path, 'rb') as f:
+        f.readline()  # Skip header
+        bounds = [f.tell()]
+        body_size = size - bounds[0]
+        
+        for i in range(1, parts):
+            # Step back one byte so an offset that is already a line start stays put
+            f.seek(bounds[0] + body_size * i // parts - 1)
+            f.readline()
+            if f.tell() > bounds[-1]:
+                bounds.append(f.tell())
+    
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+class ByteRangeFile(io.RawIOBase):
+    """Raw binary stream over the bytes of an open file between `start` and `end`"""
+
+    def __init__(self, f, start, end):
+        f.seek(start)
+        self.f = f
+        self.remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = self.f.read(min(len(b), self.remaining))
+        self.remaining -= len(data)
+        b[:len(data)] = data
+        return len(data)
+
+def read_csv_range(f, byte_range=None):
+    """Return the header and an iterator of rows over a binary CSV file, optionally limited to a byte range"""
+    header = next(csv.reader([f.readline().decode('utf-8')]))
+    whole_file = (f.tell(), os.fstat(f.fileno()).st_size)
+    if byte_range is None:
+        byte_range = whole_file
+    
+    # Let the kernel read ahead more aggressively over the range
+    if hasattr(os, 'posix_fadvise'):
+        start, end = byte_range
+        os.posix_fadvise(f.fileno(), start, end - start, os.POSIX_FADV_SEQUENTIAL)
+    
+    body = io.BufferedReader(ByteRangeFile(f, *byte_range), buffer_size=READ_BUFFER_SIZE)
+    
+    if pacsv is None:
+        return header, csv.reader(io.TextIOWrapper(body, encoding='utf-8', newline=''))
+    
+    # PyArrow parses whole blocks in C; columns stay strings so values match the csv module's.
+    # A whole-file read accepts quoted newlines like the csv module; split ranges cannot
+    # contain them (see split_byte_ranges)
+    reader = pacsv.open_csv(
+        body,
+        read_options=pacsv.ReadOptions(column_names=header, block_size=CSV_BLOCK_SIZE),
+        parse_options=pacsv.ParseOptions(newlines_in_values=byte_range == whole_file),
+        convert_options=pacsv.ConvertOptions(
+            column_types={column: pa.string() for column in header},
+            strings_can_be_null=False
+        )
+    )
+    rows = (row for batch in reader for row in zip(*(column.to_pylist() for column in batch.columns)))
+    return header, rows
+
+def describe_source(csv_file_path, byte_range=None):
+    """Name the file, or the part of it, a loader is reading"""
+    if byte_range is None:
+        return csv_file_path
+    return f"{csv_file_path} (bytes {byte_range[0]:,}-{byte_range[1]:,})"
+
+def copy_via_staging(cur, table, columns, source):
+    """COPY binary rows into an unlogged staging table, then move them into `table` in one INSERT.
+
+    Temp tables are never WAL-logged and are private to the session, so
+    parallel workers loading the same table each get their own. The staging
+    table has the target's column types but none of its defaults or
+    constraints, which keeps the id sequence untouched until the final INSERT.
+    """
+    staging_table = f"{table}_stage"
+    cur.execute(f"""
+        CREATE TEMP TABLE {staging_table} ON COMMIT DROP AS
+        SELECT {columns} FROM {table} WITH NO DATA
+    """)
+    cur.copy_expert(f"""
+        COPY {staging_table} ({columns})
+        FROM STDIN WITH (FORMAT BINARY)
+    """, source, size=COPY_CHUNK_SIZE)
+    cur.execute(f"""
+        INSERT INTO {table} ({columns})
+        SELECT {columns} FROM {staging_table}
+    """)
+
+def iter_samples(csv_file_path, resolver, byte_range=None):
+    """Yield sample rows ready for COPY"""
+    with open(csv_file_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        header, reader = read_csv_range(f, byte_range)
+        
+        # Resolve column positions once from the header
+        idx = {name: i for i, name in enumerate(header)}
+        machine_name_i = idx['machine_name']
+        component_id_i = idx['component_id']
+        component_type_i = idx['component_type']
+        component_name_i = idx['component_name']
+        data_type_i = idx['data_type']
+        timestamp_i = idx['timestamp']
+        sequence_i = idx['sequence']
+        sample_name_i = idx['sample_name']
+        value_i = idx['value']
+        sub_type_i = idx['sub_type']
         
         for row in reader:
             try:
                 # Get machine and component IDs
-                machine_id = get_machine_id_by_name(cur, row['machine_name'])
-                component_id = get_or_create_component(
-                    cur, machine_id, row['component_id'], 
-                    row['component_type'], row['component_name']
+                machine_id = resolver.get_machine_id_by_name(row[machine_name_i])
+                component_id = resolver.get_or_create_component(
+                    machine_id, row[component_id_i], 
+                    row[component_type_i], row[component_name_i]
                 )
-                data_stream_id = get_or_create_data_stream(cur, machine_id, row['data_type'])
-                
-                # Parse timestamp
-                timestamp = datetime.fromisoformat(row['timestamp'].replace('Z', '+00:00'))
+                data_stream_id = resolver.get_or_create_data_stream(machine_id, row[data_type_i])
                 
                 # Parse sequence
-                sequence = int(row.get('sequence', 0))
+                sequence = int(row[sequence_i])
                 
                 # Parse value (handle empty strings)
-                value = row.get('value', '').strip()
+                value = row[value_i].strip()
                 if value == '':
                     value = None
                 else:
                     try:
                         value = float(value)
                     except ValueError:
-                        value = value  # Keep as string if not numeric
+                        value = None  # Binary NUMERIC has no room for text
                 
-                samples_writer.writerow([
-                    data_stream_id, component_id, row['sample_name'], row['sample_name'],
-                    timestamp, sequence, value, row.get('sub_type', ''), ''
-                ])
+                value_field = PGCOPY_NULL
+                if value is not None and math.isfinite(value):
+                    value_field = pack_numeric(value)
                 
-                total_rows += 1
+                sample_name = pack_text(row[sample_name_i])
+                record = b''.join((
+                    SAMPLE_ROW, INT4_FIELD.pack(4, data_stream_id), INT4_FIELD.pack(4, component_id),
+                    sample_name, sample_name, pack_timestamp(row[timestamp_i]), INT4_FIELD.pack(4, sequence),
+                    value_field, pack_text(row[sub_type_i]), PGCOPY_NULL
+                ))
                 
-                # Commit in batches
-                if total_rows % batch_size == 0:
-                    print(f"Processed {total_rows} samples...")
-                    cur.connection.commit()
-                    
             except Exception as e:
                 print(f"Error processing sample row: {e}")
                 continue
+            
+            yield record
+
+def load_samples(cur, csv_file_path, resolver, byte_range=None):
+    """Load samples data from CSV"""
+    print(f"Loading samples from {describe_source(csv_file_path, byte_range)}...")
     
-    # Load remaining data
-    if total_rows % batch_size != 0:
-        print(f"Processed {total_rows} samples...")
-        cur.connection.commit()
+    # Stream transformed rows straight into COPY
+    samples_buf = RowIterReader(iter_samples(csv_file_path, resolver, byte_range))
     
-    # Copy to database
-    samples_buf.seek(0)
-    cur.copy_expert("""
-        COPY samples (data_stream_id, component_id, data_item_id, sample_name, 
-                     timestamp, sequence, value, sub_type, composition_id) 
-        FROM STDIN CSV HEADER
+    copy_via_staging(cur, 'samples', """
+        data_stream_id, component_id, data_item_id, sample_name, 
+        timestamp, sequence, value, sub_type, composition_id
     """, samples_buf)
+    cur.connection.commit()
     
-    print(f"Loaded {total_rows} samples into database")
+    print(f"Loaded {samples_buf.row_count} samples into database")
 
-def load_events(cur, csv_file_path):
-    """Load events data from CSV"""
-    print(f"Loading events from {csv_file_path}...")
-    
-    events_buf = StringIO()
-    events_writer = csv.writer(events_buf)
-    
-    # Write header
-    events_writer.writerow([
-        'data_stream_id', 'component_id', 'data_item_id', 'event_name',
-        'timestamp', 'sequence', 'value', 'event_type'
-    ])
-    
-    total_rows = 0
-    batch_size = 10000
-    
-    with open(csv_file_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+def iter_events(csv_file_path, resolver, byte_range=None):
+    """Yield event rows ready for COPY"""
+    with open(csv_file_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        header, reader = read_csv_range(f, byte_range)
+        
+        # Resolve column positions once from the header
+        idx = {name: i for i, name in enumerate(header)}
+        machine_name_i = idx['machine_name']
+        component_id_i = idx['component_id']
+        component_type_i = idx['component_type']
+        component_name_i = idx['component_name']
+        data_type_i = idx['data_type']
+        timestamp_i = idx['timestamp']
+        sequence_i = idx['sequence']
+        event_name_i = idx['event_name']
+        value_i = idx['value']
         
         for row in reader:
             try:
                 # Get machine and component IDs
-                machine_id = get_machine_id_by_name(cur, row['machine_name'])
-                component_id = get_or_create_component(
-                    cur, machine_id, row['component_id'],
-                    row['component_type'], row['component_name']
+                machine_id = resolver.get_machine_id_by_name(row[machine_name_i])
+                component_id = resolver.get_or_create_component(
+                    machine_id, row[component_id_i],
+                    row[component_type_i], row[component_name_i]
                 )
-                data_stream_id = get_or_create_data_stream(cur, machine_id, row['data_type'])
-                
-                # Parse timestamp
-                timestamp = datetime.fromisoformat(row['timestamp'].replace('Z', '+00:00'))
+                data_stream_id = resolver.get_or_create_data_stream(machine_id, row[data_type_i])
                 
                 # Parse sequence
-                sequence = int(row.get('sequence', 0))
+                sequence = int(row[sequence_i])
                 
                 # Determine event type based on event name
-                event_name = row['event_name']
-                if 'program' in event_name.lower():
-                    event_type = 'PROGRAM'
-                elif 'door' in event_name.lower() or 'safety' in event_name.lower():
-                    event_type = 'SAFETY'
-                elif 'control' in event_name.lower():
-                    event_type = 'CONTROL'
-                else:
-                    event_type = 'EXECUTION'
+                event_name = row[event_name_i]
+                event_type = classify_event(event_name)
                 
-                events_writer.writerow([
-                    data_stream_id, component_id, event_name, event_name,
-                    timestamp, sequence, row.get('value', ''), event_type
-                ])
+                event_name_field = pack_text(event_name)
+                record = b''.join((
+                    EVENT_ROW, INT4_FIELD.pack(4, data_stream_id), INT4_FIELD.pack(4, component_id),
+                    event_name_field, event_name_field, pack_timestamp(row[timestamp_i]),
+                    INT4_FIELD.pack(4, sequence), pack_text(row[value_i]), pack_text(event_type)
+                ))
                 
-                total_rows += 1
-                
-                # Commit in batches
-                if total_rows % batch_size == 0:
-                    print(f"Processed {total_rows} events...")
-                    cur.connection.commit()
-                    
             except Exception as e:
                 print(f"Error processing event row: {e}")
                 continue
+            
+            yield record
+
+def load_events(cur, csv_file_path, resolver, byte_range=None):
+    """Load events data from CSV"""
+    print(f"Loading events from {describe_source(csv_file_path, byte_range)}...")
     
-    # Load remaining data
-    if total_rows % batch_size != 0:
-        print(f"Processed {total_rows} events...")
-        cur.connection.commit()
+    events_buf = RowIterReader(iter_events(csv_file_path, resolver, byte_range))
     
-    # Copy to database
-    events_buf.seek(0)
-    cur.copy_expert("""
-        COPY events (data_stream_id, component_id, data_item_id, event_name,
-                    timestamp, sequence, value, event_type)
-        FROM STDIN CSV HEADER
+    copy_via_staging(cur, 'events', """
+        data_stream_id, component_id, data_item_id, event_name,
+        timestamp, sequence, value, event_type
     """, events_buf)
+    cur.connection.commit()
     
-    print(f"Loaded {total_rows} events into database")
+    print(f"Loaded {events_buf.row_count} events into database")
 
-def load_conditions(cur, csv_file_path):
-    """Load conditions data from CSV"""
-    print(f"Loading conditions from {csv_file_path}...")
-    
-    conditions_buf = StringIO()
-    conditions_writer = csv.writer(conditions_buf)
-    
-    # Write header
-    conditions_writer.writerow([
-        'data_stream_id', 'component_id', 'data_item_id', 'condition_name',
-        'timestamp', 'sequence', 'state', 'category', 'message'
-    ])
-    
-    total_rows = 0
-    batch_size = 10000
-    
-    with open(csv_file_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+def iter_conditions(csv_file_path, resolver, byte_range=None):
+    """Yield condition rows ready for COPY"""
+    with open(csv_file_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        header, reader = read_csv_range(f, byte_range)
+        
+        # Resolve column positions once from the header
+        idx = {name: i for i, name in enumerate(header)}
+        machine_name_i = idx['machine_name']
+        component_id_i = idx['component_id']
+        component_type_i = idx['component_type']
+        component_name_i = idx['component_name']
+        data_type_i = idx['data_type']
+        timestamp_i = idx['timestamp']
+        sequence_i = idx['sequence']
+        condition_name_i = idx['condition_name']
+        state_i = idx['state']
+        category_i = idx['category']
         
         for row in reader:
             try:
                 # Get machine and component IDs
-                machine_id = get_machine_id_by_name(cur, row['machine_name'])
-                component_id = get_or_create_component(
-                    cur, machine_id, row['component_id'],
-                    row['component_type'], row['component_name']
+                machine_id = resolver.get_machine_id_by_name(row[machine_name_i])
+                component_id = resolver.get_or_create_component(
+                    machine_id, row[component_id_i],
+                    row[component_type_i], row[component_name_i]
                 )
-                data_stream_id = get_or_create_data_stream(cur, machine_id, row['data_type'])
-                
-                # Parse timestamp
-                timestamp = datetime.fromisoformat(row['timestamp'].replace('Z', '+00:00'))
+                data_stream_id = resolver.get_or_create_data_stream(machine_id, row[data_type_i])
                 
                 # Parse sequence
-                sequence = int(row.get('sequence', 0))
+                sequence = int(row[sequence_i])
                 
                 # Map state
-                state = 'NORMAL'
-                if row.get('state') == '#text':
-                    state = 'NORMAL'
-                elif 'warning' in row.get('state', '').lower():
-                    state = 'WARNING'
-                elif 'fault' in row.get('state', '').lower():
-                    state = 'FAULT'
+                state_text = row[state_i]
+                state = classify_state(state_text)
                 
                 # Map category
-                category_mapping = {
-                    'TEMPERATURE': 'TEMPERATURE',
-                    'LOAD': 'LOAD',
-                    'LOGIC_PROGRAM': 'LOGIC_PROGRAM',
-                    'COMMUNICATIONS': 'COMMUNICATIONS'
-                }
-                category = category_mapping.get(row.get('category', ''), 'TEMPERATURE')
+                category = CATEGORY_MAPPING.get(row[category_i], 'TEMPERATURE')
                 
-                conditions_writer.writerow([
-                    data_stream_id, component_id, row['condition_name'], row['condition_name'],
-                    timestamp, sequence, state, category, row.get('state', '')
-                ])
+                condition_name = pack_text(row[condition_name_i])
+                record = b''.join((
+                    CONDITION_ROW, INT4_FIELD.pack(4, data_stream_id), INT4_FIELD.pack(4, component_id),
+                    condition_name, condition_name, pack_timestamp(row[timestamp_i]), INT4_FIELD.pack(4, sequence),
+                    pack_text(state), pack_text(category), pack_text(state_text)
+                ))
                 
-                total_rows += 1
-                
-                # Commit in batches
-                if total_rows % batch_size == 0:
-                    print(f"Processed {total_rows} conditions...")
-                    cur.connection.commit()
-                    
             except Exception as e:
                 print(f"Error processing condition row: {e}")
                 continue
+            
+            yield record
+
+def load_conditions(cur, csv_file_path, resolver, byte_range=None):
+    """Load conditions data from CSV"""
+    print(f"Loading conditions from {describe_source(csv_file_path, byte_range)}...")
     
-    # Load remaining data
-    if total_rows % batch_size != 0:
-        print(f"Processed {total_rows} conditions...")
-        cur.connection.commit()
+    conditions_buf = RowIterReader(iter_conditions(csv_file_path, resolver, byte_range))
     
-    # Copy to database
-    conditions_buf.seek(0)
-    cur.copy_expert("""
-        COPY conditions (data_stream_id, component_id, data_item_id, condition_name,
-                        timestamp, sequence, state, category, message)
-        FROM STDIN CSV HEADER
+    copy_via_staging(cur, 'conditions', """
+        data_stream_id, component_id, data_item_id, condition_name,
+        timestamp, sequence, state, category, message
     """, conditions_buf)
+    cur.connection.commit()
+    
+    print(f"Loaded {conditions_buf.row_count} conditions into database")
+
+def drop_secondary_indexes(cur, table):
+    """Drop a table's non-unique indexes, returning the DDL to recreate them"""
+    cur.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = %s::regclass AND NOT i.indisprimary AND NOT i.indisunique
+    """, (table,))
+    indexes = cur.fetchall()
+    
+    for index_name, _ in indexes:
+        cur.execute(f"DROP INDEX {index_name}")
+    return [index_ddl for _, index_ddl in indexes]
+
+LOADERS = {
+    'samples': load_samples,
+    'events': load_events,
+    'conditions': load_conditions,
+}
+
+# Connections and lookup cache of the current worker process, opened on its first job
+_worker_state = None
+
+def close_worker_connections():
+    """Close the current worker's connections; runs when the worker process exits"""
+    global _worker_state
+    if _worker_state is None:
+        return
+    conn, cur, lookup_conn, _ = _worker_state
+    _worker_state = None
+    lookup_conn.close()
+    cur.close()
+    conn.close()
+
+def get_worker_connections():
+    """Return this worker's COPY cursor and Resolver, connecting on first use"""
+    global _worker_state
+    if _worker_state is None:
+        conn = psycopg2.connect(**DB_PARAMS)
+        cur = conn.cursor()
+        
+        # Set up for bulk loading; committed so a failed load's rollback keeps them
+        cur.execute("SET session_replication_role = replica;")  # Disable triggers temporarily
+        for setting in LOAD_SESSION_SETTINGS:
+            cur.execute(setting)
+        conn.commit()
+        
+        # Lookup misses are inserted on a separate autocommit connection because
+        # the main one is busy streaming the COPY while rows are being resolved
+        lookup_conn = psycopg2.connect(**DB_PARAMS)
+        lookup_conn.autocommit = True
+        
+        _worker_state = (conn, cur, lookup_conn, Resolver(lookup_conn.cursor()))
+        multiprocessing.util.Finalize(None, close_worker_connections, exitpriority=10)
     
-    print(f"Loaded {total_rows} conditions into database")
+    _, cur, _, resolver = _worker_state
+    return cur, resolver
+
+def run_loader(table, csv_file_path, byte_range=None):
+    """Load one CSV file or byte range; runs in a worker process and reuses its connections"""
+    cur, resolver = get_worker_connections()
+    conn = cur.connection
+    
+    try:
+        LOADERS[table](cur, csv_file_path, resolver, byte_range)
+        conn.commit()
+    except Exception:
+        if conn.closed:
+            # Reconnect on the next job rather than reuse a dead connection
+            close_worker_connections()
+        else:
+            conn.rollback()
+        raise
 
 def main():
     parser = argparse.ArgumentParser(description='Load processed CSV data into Mazak database')
@@ -343,6 +709,11 @@ def main():
     parser.add_argument('--conditions', action='store_true', help='Load conditions data')
     parser.add_argument('--all', action='store_true', help='Load all data types')
     parser.add_argument('--data-dir', default='src/data/processed', help='Directory containing CSV files')
+    parser.add_argument('--sample-workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Number of parallel COPY workers for the samples file (default: at most 4)')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Number of worker processes (default: at most 4); each keeps 2 database '
+                             'connections open across jobs, plus 1 for the main process')
     
     args = parser.parse_args()
     
@@ -350,64 +721,90 @@ def main():
         print("Please specify which data to load: --samples, --events, --conditions, or --all")
         return
     
+    jobs = []
+    for table, selected in (('samples', args.samples), ('events', args.events), ('conditions', args.conditions)):
+        if not (args.all or selected):
+            continue
+        csv_file_path = os.path.join(args.data_dir, f'{table}.csv')
+        if not os.path.exists(csv_file_path):
+            print(f"{table.capitalize()} file not found: {csv_file_path}")
+        elif table == 'samples' and args.sample_workers > 1:
+            # samples.csv is by far the largest, so it is split across several COPYs
+            for byte_range in split_byte_ranges(csv_file_path, args.sample_workers):
+                jobs.append((table, csv_file_path, byte_range))
+        else:
+            jobs.append((table, csv_file_path, None))
+    
     try:
-        # Connect to database
         print("Connecting to database...")
         conn = psycopg2.connect(**DB_PARAMS)
         cur = conn.cursor()
         
-        # Set up for bulk loading
-        cur.execute("SET session_replication_role = replica;")  # Disable triggers temporarily
+        # maintenance_work_mem also speeds up the index rebuild below
+        for setting in LOAD_SESSION_SETTINGS:
+            cur.execute(setting)
         
-        if args.all or args.samples:
-            samples_file = os.path.join(args.data_dir, 'samples.csv')
-            if os.path.exists(samples_file):
-                load_samples(cur, samples_file)
-            else:
-                print(f"Samples file not found: {samples_file}")
-        
-        if args.all or args.events:
-            events_file = os.path.join(args.data_dir, 'events.csv')
-            if os.path.exists(events_file):
-                load_events(cur, events_file)
-            else:
-                print(f"Events file not found: {events_file}")
+        # Drop secondary indexes up front and build them once over the loaded
+        # data, instead of maintaining them row by row during every COPY
+        index_ddls = []
+        for table in dict.fromkeys(table for table, _, _ in jobs):
+            index_ddls += drop_secondary_indexes(cur, table)
+        conn.commit()
         
-        if args.all or args.conditions:
-            conditions_file = os.path.join(args.data_dir, 'conditions.csv')
-            if os.path.exists(conditions_file):
-                load_conditions(cur, conditions_file)
-            else:
-                print(f"Conditions file not found: {conditions_file}")
+        try:
+            # Jobs load concurrently in worker processes, each reusing its own connections
+            failed = []
+            with ProcessPoolExecutor(max_workers=max(1, min(len(jobs), args.workers))) as executor:
+                futures = {
+                    executor.submit(run_loader, table, csv_file_path, byte_range): table
+                    for table, csv_file_path, byte_range in jobs
+                }
+                for future in as_completed(futures):
+                    table = futures[future]
+                    try:
+                        future.result()
+                    except psycopg2.Error as e:
+                        print(f"Database error loading {table}: {e}")
+                        failed.append(table)
+                    except Exception as e:
+                        print(f"Unexpected error loading {table}: {e}")
+                        failed.append(table)
+        finally:
+            # Rebuild the indexes even if a load failed
+            if index_ddls:
+                print(f"Rebuilding {len(index_ddls)} indexes...")
+            for index_ddl in index_ddls:
+                cur.execute(index_ddl)
+            conn.commit()
         
-        # Re-enable triggers
-        cur.execute("SET session_replication_role = DEFAULT;")
+        if failed:
+            print(f"\nData loading failed for: {', '.join(sorted(set(failed)))}")
+        else:
+            print("\nData loading completed successfully!")
         
-        # Commit all changes
+        # Show summary. Freshly loaded tables need ANALYZE anyway, and the row
+        # estimates it leaves in pg_class are read without scanning the tables.
+        for table in ('samples', 'events', 'conditions'):
+            cur.execute(f"ANALYZE {table}")
+        cur.execute("""
+            SELECT relname, GREATEST(reltuples, 0)::bigint FROM pg_class
+            WHERE oid IN ('samples'::regclass, 'events'::regclass, 'conditions'::regclass)
+        """)
+        row_counts = dict(cur.fetchall())
         conn.commit()
-        print("\nData loading completed successfully!")
-        
-        # Show summary
-        cur.execute("SELECT COUNT(*) FROM samples")
-        sample_count = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(*) FROM events")
-        event_count = cur.fetchone()[0]
-        cur.execute("SELECT COUNT(*) FROM conditions")
-        condition_count = cur.fetchone()[0]
+        sample_count = row_counts['samples']
+        event_count = row_counts['events']
+        condition_count = row_counts['conditions']
         
-        print(f"\nDatabase Summary:")
+        print(f"\nDatabase Summary (estimated rows):")
         print(f"  Samples: {sample_count:,}")
         print(f"  Events: {event_count:,}")
         print(f"  Conditions: {condition_count:,}")
         
     except psycopg2.Error as e:
         print(f"Database error: {e}")
-        if 'conn' in locals():
-            conn.rollback()
     except Exception as e:
         print(f"Unexpected error: {e}")
-        if 'conn' in locals():
-            conn.rollback()
     finally:
         if 'cur' in locals():
             cur.close()
@@ -416,5 +813,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-
@@ -11,17 +11,73 @@ Date: 2025-07-07
 """
 
 import json
+import math
+import pickle
 import pandas as pd
 import os
-import glob
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import logging
 
+# Prefer the faster JSON parsers when installed; all three accept raw bytes
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        _json_loads = ujson.loads
+    except ImportError:
+        _json_loads = json.loads
+
+# Optional streaming parser, used for files too large to load in one piece
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Bump whenever the processed record layout changes, to invalidate sidecar caches
+CACHE_VERSION = 1
+
+# Files above this size are streamed one component at a time when ijson is installed
+STREAM_THRESHOLD_BYTES = 512 * 1024 * 1024
+
+# Column order of the row-level tables, which are accumulated one list per column
+CONDITION_COLUMNS = ('machine_name', 'data_type', 'component_id', 'component_type', 'component_name',
+                     'condition_name', 'timestamp', 'sequence', 'state', 'category')
+SAMPLE_COLUMNS = ('machine_name', 'data_type', 'component_id', 'component_type', 'component_name',
+                  'sample_name', 'timestamp', 'sequence', 'value', 'value_num', 'sub_type')
+EVENT_COLUMNS = ('machine_name', 'data_type', 'component_id', 'component_type', 'component_name',
+                 'event_name', 'timestamp', 'sequence', 'value', 'value_num')
+
+# Low-cardinality columns of the row-level tables, stored as pandas categoricals
+CATEGORY_COLUMNS = ('machine_name', 'data_type', 'component_id', 'component_type', 'component_name',
+                    'condition_name', 'sample_name', 'event_name', 'sub_type', 'category')
+
+# Parquet writer settings shared by every table written by this module
+PARQUET_ROW_GROUP_SIZE = 262_144
+PARQUET_WRITE_OPTIONS = {
+    'compression': 'zstd',
+    'compression_level': 3,
+    'use_dictionary': list(CATEGORY_COLUMNS),
+    'coerce_timestamps': 'us',
+    'allow_truncated_timestamps': True,
+}
+
+
+class _StringPool(dict):
+    """Maps each value to the first equal object seen, so repeated strings share one object."""
+    
+    def __missing__(self, key):
+        self[key] = key
+        return key
+
 
 class CombinedDataReader:
     """
@@ -50,11 +106,31 @@ class CombinedDataReader:
         Returns:
             List[str]: List of JSON file paths
         """
-        pattern = os.path.join(self.data_directory, "*.json")
-        json_files = glob.glob(pattern)
+        # scandir reuses the directory entry types instead of pattern matching and stat calls;
+        # hidden files are skipped as the previous "*.json" glob did
+        with os.scandir(self.data_directory) as entries:
+            json_files = [entry.path for entry in entries
+                          if entry.name.endswith('.json') and not entry.name.startswith('.') and entry.is_file()]
         logger.info(f"Found {len(json_files)} JSON files in {self.data_directory}")
         return json_files
     
+    def invalidate_cache(self) -> int:
+        """
+        Delete the sidecar caches of processed records in the data directory.
+        
+        Returns:
+            int: Number of cache files removed
+        """
+        removed = 0
+        for filepath in self.get_json_files():
+            try:
+                os.remove(_cache_path(filepath))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        logger.info(f"Removed {removed} cache files from {self.data_directory}")
+        return removed
+    
     def parse_machine_info(self, filename: str) -> Tuple[str, str, str]:
         """
         Parse machine information from filename.
@@ -96,9 +172,9 @@ class CombinedDataReader:
             Dict: Parsed JSON data
         """
         try:
-            with open(filepath, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-            logger.info(f"Successfully loaded {os.path.basename(filepath)}")
+            with open(filepath, 'rb') as file:
+                data = _json_loads(file.read())
+            logger.debug("Successfully loaded %s", os.path.basename(filepath))
             return data
         except Exception as e:
             logger.error(f"Error reading {filepath}: {str(e)}")
@@ -133,7 +209,7 @@ class CombinedDataReader:
         
         return processed_metadata
     
-    def process_conditions(self, json_data: Dict, machine_name: str, data_type: str) -> List[Dict]:
+    def process_conditions(self, json_data: Dict, machine_name: str, data_type: str) -> Dict[str, List]:
         """
         Process conditions data from components.
         
@@ -143,35 +219,38 @@ class CombinedDataReader:
             data_type (str): Type of data (current/sample)
             
         Returns:
-            List[Dict]: List of condition records
+            Dict[str, List]: Condition records as one list per column
         """
-        conditions = []
+        conditions = {column: [] for column in CONDITION_COLUMNS}
         device = json_data.get('data', {}).get('device', {})
         components = device.get('components', {})
+        shared = _StringPool()
         
         for component_id, component_data in components.items():
-            component_type = component_data.get('type', '')
-            component_name = component_data.get('name', '')
+            component_type = shared[component_data.get('type', '')]
+            component_name = shared[component_data.get('name', '')]
             component_conditions = component_data.get('conditions', {})
+            count = len(component_conditions)
+            
+            conditions['component_id'].extend([component_id] * count)
+            conditions['component_type'].extend([component_type] * count)
+            conditions['component_name'].extend([component_name] * count)
+            conditions['condition_name'].extend([shared[name] for name in component_conditions])
             
-            for condition_name, condition_data in component_conditions.items():
-                condition_record = {
-                    'machine_name': machine_name,
-                    'data_type': data_type,
-                    'component_id': component_id,
-                    'component_type': component_type,
-                    'component_name': component_name,
-                    'condition_name': condition_name,
-                    'timestamp': condition_data.get('timestamp'),
-                    'sequence': condition_data.get('sequence'),
-                    'state': condition_data.get('state'),
-                    'category': condition_data.get('category'),
-                }
-                conditions.append(condition_record)
+            condition_list = component_conditions.values()
+            conditions['timestamp'].extend([c.get('timestamp') for c in condition_list])
+            conditions['sequence'].extend([c.get('sequence') for c in condition_list])
+            conditions['state'].extend([shared[c.get('state')] for c in condition_list])
+            conditions['category'].extend([shared[c.get('category')] for c in condition_list])
+        
+        # Constant for the whole file, so filled in once at the end
+        total = len(conditions['timestamp'])
+        conditions['machine_name'] = [machine_name] * total
+        conditions['data_type'] = [data_type] * total
         
         return conditions
     
-    def process_samples(self, json_data: Dict, machine_name: str, data_type: str) -> List[Dict]:
+    def process_samples(self, json_data: Dict, machine_name: str, data_type: str) -> Dict[str, List]:
         """
         Process samples data from components.
         
@@ -181,37 +260,40 @@ class CombinedDataReader:
             data_type (str): Type of data (current/sample)
             
         Returns:
-            List[Dict]: List of sample records
+            Dict[str, List]: Sample records as one list per column
         """
-        samples = []
+        samples = {column: [] for column in SAMPLE_COLUMNS}
         device = json_data.get('data', {}).get('device', {})
         components = device.get('components', {})
+        shared = _StringPool()
         
         for component_id, component_data in components.items():
-            component_type = component_data.get('type', '')
-            component_name = component_data.get('name', '')
+            component_type = shared[component_data.get('type', '')]
+            component_name = shared[component_data.get('name', '')]
             component_samples = component_data.get('samples', {})
             
             for sample_name, sample_list in component_samples.items():
-                if isinstance(sample_list, list):
-                    for sample_data in sample_list:
-                        sample_record = {
-                            'machine_name': machine_name,
-                            'data_type': data_type,
-                            'component_id': component_id,
-                            'component_type': component_type,
-                            'component_name': component_name,
-                            'sample_name': sample_name,
-                            'timestamp': sample_data.get('timestamp'),
-                            'sequence': sample_data.get('sequence'),
-                            'value': sample_data.get('value'),
-                            'sub_type': sample_data.get('subType'),
-                        }
-                        samples.append(sample_record)
+                if type(sample_list) is list:
+                    count = len(sample_list)
+                    samples['component_id'].extend([component_id] * count)
+                    samples['component_type'].extend([component_type] * count)
+                    samples['component_name'].extend([component_name] * count)
+                    samples['sample_name'].extend([shared[sample_name]] * count)
+                    samples['timestamp'].extend([s.get('timestamp') for s in sample_list])
+                    samples['sequence'].extend([s.get('sequence') for s in sample_list])
+                    values = [s.get('value') for s in sample_list]
+                    samples['value'].extend(values)
+                    samples['value_num'].extend([_numeric_value(v) for v in values])
+                    samples['sub_type'].extend([shared[s.get('subType')] for s in sample_list])
+        
+        # Constant for the whole file, so filled in once at the end
+        total = len(samples['timestamp'])
+        samples['machine_name'] = [machine_name] * total
+        samples['data_type'] = [data_type] * total
         
         return samples
     
-    def process_events(self, json_data: Dict, machine_name: str, data_type: str) -> List[Dict]:
+    def process_events(self, json_data: Dict, machine_name: str, data_type: str) -> Dict[str, List]:
         """
         Process events data from components.
         
@@ -221,32 +303,35 @@ class CombinedDataReader:
             data_type (str): Type of data (current/sample)
             
         Returns:
-            List[Dict]: List of event records
+            Dict[str, List]: Event records as one list per column
         """
-        events = []
+        events = {column: [] for column in EVENT_COLUMNS}
         device = json_data.get('data', {}).get('device', {})
         components = device.get('components', {})
+        shared = _StringPool()
         
         for component_id, component_data in components.items():
-            component_type = component_data.get('type', '')
-            component_name = component_data.get('name', '')
+            component_type = shared[component_data.get('type', '')]
+            component_name = shared[component_data.get('name', '')]
             component_events = component_data.get('events', {})
             
             for event_name, event_list in component_events.items():
-                if isinstance(event_list, list):
-                    for event_data in event_list:
-                        event_record = {
-                            'machine_name': machine_name,
-                            'data_type': data_type,
-                            'component_id': component_id,
-                            'component_type': component_type,
-                            'component_name': component_name,
-                            'event_name': event_name,
-                            'timestamp': event_data.get('timestamp'),
-                            'sequence': event_data.get('sequence'),
-                            'value': event_data.get('value'),
-                        }
-                        events.append(event_record)
+                if type(event_list) is list:
+                    count = len(event_list)
+                    events['component_id'].extend([component_id] * count)
+                    events['component_type'].extend([component_type] * count)
+                    events['component_name'].extend([component_name] * count)
+                    events['event_name'].extend([shared[event_name]] * count)
+                    events['timestamp'].extend([e.get('timestamp') for e in event_list])
+                    events['sequence'].extend([e.get('sequence') for e in event_list])
+                    values = [e.get('value') for e in event_list]
+                    events['value'].extend(values)
+                    events['value_num'].extend([_numeric_value(v) for v in values])
+        
+        # Constant for the whole file, so filled in once at the end
+        total = len(events['timestamp'])
+        events['machine_name'] = [machine_name] * total
+        events['data_type'] = [data_type] * total
         
         return events
     
@@ -267,20 +352,22 @@ class CombinedDataReader:
         device_components = device.get('components', {})
         
         for component_id, component_data in device_components.items():
+            component_conditions = component_data.get('conditions') or {}
+            component_samples = component_data.get('samples') or {}
+            component_events = component_data.get('events') or {}
+            
             component_record = {
                 'machine_name': machine_name,
                 'data_type': data_type,
                 'component_id': component_id,
                 'component_type': component_data.get('type', ''),
                 'component_name': component_data.get('name', ''),
-                'has_conditions': bool(component_data.get('conditions', {})),
-                'has_samples': bool(component_data.get('samples', {})),
-                'has_events': bool(component_data.get('events', {})),
-                'conditions_count': len(component_data.get('conditions', {})),
-                'samples_count': sum(len(v) if isinstance(v, list) else 0 
-                                   for v in component_data.get('samples', {}).values()),
-                'events_count': sum(len(v) if isinstance(v, list) else 0 
-                                  for v in component_data.get('events', {}).values()),
+                'has_conditions': bool(component_conditions),
+                'has_samples': bool(component_samples),
+                'has_events': bool(component_events),
+                'conditions_count': len(component_conditions),
+                'samples_count': sum(len(v) for v in component_samples.values() if type(v) is list),
+                'events_count': sum(len(v) for v in component_events.values() if type(v) is list),
             }
             components.append(component_record)
         
@@ -310,56 +397,157 @@ class CombinedDataReader:
         
         return machine_record
     
-    def read_all_files(self) -> None:
+    def process_file(self, filepath: str) -> Optional[Tuple[Dict, Dict[str, List], Dict[str, List],
+                                                            Dict[str, List], List[Dict], Dict]]:
         """
-        Read all JSON files and process them into DataFrames.
+        Read a single JSON file and process every section of it.
+        
+        Args:
+            filepath (str): Path to the JSON file
+            
+        Returns:
+            Optional[Tuple]: metadata, conditions, samples, events, components and
+                machine records, or None if the file could not be read
+        """
+        logger.debug("Processing %s", os.path.basename(filepath))
+        
+        # Parse machine info from filename
+        machine_name, data_type, timestamp = self.parse_machine_info(filepath)
+        
+        if ijson is not None and os.path.getsize(filepath) > STREAM_THRESHOLD_BYTES:
+            return self.stream_file(filepath, machine_name, data_type)
+        
+        # Read JSON data
+        json_data = self.read_single_file(filepath)
+        if not json_data:
+            return None
+        
+        # Process each data type
+        return (
+            self.process_metadata(json_data, machine_name, data_type, filepath),
+            self.process_conditions(json_data, machine_name, data_type),
+            self.process_samples(json_data, machine_name, data_type),
+            self.process_events(json_data, machine_name, data_type),
+            self.process_components(json_data, machine_name, data_type),
+            self.process_machines(json_data, machine_name, data_type),
+        )
+    
+    def stream_file(self, filepath: str, machine_name: str, data_type: str) -> Optional[Tuple]:
+        """
+        Process a large JSON file with ijson, holding only one component in memory at a time.
+        
+        Each component is run through the regular process_* methods on its own
+        and the per-column lists are merged, so the output matches process_file.
+        
+        Args:
+            filepath (str): Path to the JSON file
+            machine_name (str): Machine identifier
+            data_type (str): Type of data (current/sample)
+            
+        Returns:
+            Optional[Tuple]: metadata, conditions, samples, events, components and
+                machine records, or None if the file could not be read
+        """
+        conditions = {column: [] for column in CONDITION_COLUMNS}
+        samples = {column: [] for column in SAMPLE_COLUMNS}
+        events = {column: [] for column in EVENT_COLUMNS}
+        components = []
+        metadata = {}
+        device = {}
+        
+        try:
+            with open(filepath, 'rb') as file:
+                for section, value in _iter_streamed_sections(file):
+                    if section == 'metadata':
+                        metadata = value
+                        continue
+                    if section == 'device':
+                        device.update(value)
+                        continue
+                    
+                    component_id, component_data = value
+                    json_data = {'data': {'device': {'components': {component_id: component_data}}}}
+                    for merged, part in ((conditions, self.process_conditions(json_data, machine_name, data_type)),
+                                         (samples, self.process_samples(json_data, machine_name, data_type)),
+                                         (events, self.process_events(json_data, machine_name, data_type))):
+                        for column, values in part.items():
+                            merged[column].extend(values)
+                    components.extend(self.process_components(json_data, machine_name, data_type))
+        except Exception as e:
+            logger.error(f"Error streaming {filepath}: {str(e)}")
+            return None
+        
+        machine = self.process_machines({'data': {'device': device}}, machine_name, data_type)
+        machine['components_count'] = len(components)
+        
+        logger.debug("Successfully streamed %s", os.path.basename(filepath))
+        return (
+            self.process_metadata({'metadata': metadata}, machine_name, data_type, filepath),
+            conditions,
+            samples,
+            events,
+            components,
+            machine,
+        )
+    
+    def iter_processed_files(self, max_workers: Optional[int] = None):
+        """
+        Process all JSON files, yielding the records of each file that could be read.
+        
+        Files are parsed in parallel worker processes, since parsing and
+        flattening each file is CPU-bound and independent of the others.
+        
+        Args:
+            max_workers (Optional[int]): Number of worker processes (defaults to the CPU count)
+            
+        Yields:
+            Tuple: metadata, conditions, samples, events, components and machine records
         """
         json_files = self.get_json_files()
+        start = time.perf_counter()
+        processed = 0
+        
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            for result in executor.map(_process_one, json_files, chunksize=4):
+                if result is not None:
+                    processed += 1
+                    yield result
+        
+        # Per-file progress is logged at DEBUG; only this summary is logged at INFO
+        logger.info(f"Processed {processed} of {len(json_files)} files in {time.perf_counter() - start:.2f} sec")
+    
+    def read_all_files(self, max_workers: Optional[int] = None) -> None:
+        """
+        Read all JSON files and process them into DataFrames.
         
+        Args:
+            max_workers (Optional[int]): Number of worker processes (defaults to the CPU count)
+        """
         all_metadata = []
-        all_conditions = []
-        all_samples = []
-        all_events = []
+        all_conditions = {column: [] for column in CONDITION_COLUMNS}
+        all_samples = {column: [] for column in SAMPLE_COLUMNS}
+        all_events = {column: [] for column in EVENT_COLUMNS}
         all_components = []
         all_machines = []
         
-        for filepath in json_files:
-            logger.info(f"Processing {os.path.basename(filepath)}")
-            
-            # Parse machine info from filename
-            machine_name, data_type, timestamp = self.parse_machine_info(filepath)
-            
-            # Read JSON data
-            json_data = self.read_single_file(filepath)
-            if not json_data:
-                continue
-            
-            # Process each data type
-            metadata = self.process_metadata(json_data, machine_name, data_type, filepath)
+        for metadata, conditions, samples, events, components, machine in self.iter_processed_files(max_workers):
             all_metadata.append(metadata)
-            
-            conditions = self.process_conditions(json_data, machine_name, data_type)
-            all_conditions.extend(conditions)
-            
-            samples = self.process_samples(json_data, machine_name, data_type)
-            all_samples.extend(samples)
-            
-            events = self.process_events(json_data, machine_name, data_type)
-            all_events.extend(events)
-            
-            components = self.process_components(json_data, machine_name, data_type)
+            for column, values in conditions.items():
+                all_conditions[column].extend(values)
+            for column, values in samples.items():
+                all_samples[column].extend(values)
+            for column, values in events.items():
+                all_events[column].extend(values)
             all_components.extend(components)
-            
-            machine = self.process_machines(json_data, machine_name, data_type)
             all_machines.append(machine)
         
         # Create DataFrames
         logger.info("Creating DataFrames...")
         
         self.metadata_df = pd.DataFrame(all_metadata)
-        self.conditions_df = pd.DataFrame(all_conditions)
-        self.samples_df = pd.DataFrame(all_samples)
-        self.events_df = pd.DataFrame(all_events)
+        self.conditions_df = _with_categories(pd.DataFrame(all_conditions))
+        self.samples_df = _with_categories(pd.DataFrame(all_samples))
+        self.events_df = _with_categories(pd.DataFrame(all_events))
         self.components_df = pd.DataFrame(all_components)
         self.machines_df = pd.DataFrame(all_machines)
         
@@ -383,7 +571,10 @@ class CombinedDataReader:
             if df is not None:
                 for col in columns:
                     if col in df.columns:
-                        df[col] = pd.to_datetime(df[col], errors='coerce')
+                        # A fixed ISO 8601 format skips per-element format inference, and
+                        # cache=True parses each distinct timestamp string only once; utc=True
+                        # accepts mixed offsets and matches the dtypes of stream_to_parquet
+                        df[col] = pd.to_datetime(df[col], format='ISO8601', errors='coerce', utc=True, cache=True)
     
     def _print_summary(self) -> None:
         """Print summary of loaded data."""
@@ -408,7 +599,10 @@ class CombinedDataReader:
         
         print("\nMachine Summary:")
         if self.machines_df is not None:
-            machine_summary = self.machines_df.groupby('machine_name')['data_type'].apply(list).to_dict()
+            machine_summary = {}
+            pairs = self.machines_df[['machine_name', 'data_type']].drop_duplicates().values.tolist()
+            for machine, data_type in sorted(pairs):
+                machine_summary.setdefault(machine, []).append(data_type)
             for machine, types in machine_summary.items():
                 print(f"  {machine}: {', '.join(types)}")
         
@@ -437,6 +631,11 @@ class CombinedDataReader:
         Args:
             output_directory (str): Directory to save CSV files
         """
+        try:
+            import pyarrow.csv as pacsv
+        except ImportError:
+            pacsv = None
+        
         os.makedirs(output_directory, exist_ok=True)
         
         dataframes = self.get_dataframes()
@@ -444,25 +643,16 @@ class CombinedDataReader:
         for name, df in dataframes.items():
             if df is not None and not df.empty:
                 output_path = os.path.join(output_directory, f"{name}.csv")
-                df.to_csv(output_path, index=False)
+                if pacsv is not None:
+                    # Arrow's multithreaded writer avoids pandas' per-cell Python formatting
+                    pacsv.write_csv(_to_arrow_table(df), output_path,
+                                    write_options=pacsv.WriteOptions(include_header=True))
+                else:
+                    df.to_csv(output_path, index=False)
                 logger.info(f"Saved {name} to {output_path}")
         
         logger.info(f"All DataFrames saved to {output_directory}")
     
-    def _prepare_for_parquet(self) -> None:
-        """Prepare DataFrames for Parquet format by ensuring consistent data types for 'value' columns."""
-        value_columns = {
-            'samples_df': ['value'],
-            'events_df': ['value'],
-            'conditions_df': ['value'],
-        }
-        for df_name, columns in value_columns.items():
-            df = getattr(self, df_name)
-            if df is not None:
-                for col in columns:
-                    if col in df.columns:
-                        df[col] = df[col].astype(str)
-
     def save_to_parquet(self, output_directory: str) -> None:
         """
         Save all DataFrames to Parquet files for better performance.
@@ -470,16 +660,241 @@ class CombinedDataReader:
         Args:
             output_directory (str): Directory to save Parquet files
         """
+        import pyarrow.parquet as pq
+        
         os.makedirs(output_directory, exist_ok=True)
-        self._prepare_for_parquet()
+        row_tables = {'conditions': CONDITION_COLUMNS, 'samples': SAMPLE_COLUMNS, 'events': EVENT_COLUMNS}
         dataframes = self.get_dataframes()
         for name, df in dataframes.items():
             if df is not None and not df.empty:
                 output_path = os.path.join(output_directory, f"{name}.parquet")
-                df.to_parquet(output_path, index=False)
+                if name in row_tables:
+                    # Cast to the schema stream_to_parquet writes, so files from both are interchangeable
+                    schema = _row_table_schema(row_tables[name])
+                    table = _to_arrow_table(df).select(schema.names).cast(schema)
+                    pq.write_table(table, output_path, row_group_size=PARQUET_ROW_GROUP_SIZE,
+                                   **PARQUET_WRITE_OPTIONS)
+                else:
+                    df.to_parquet(output_path, engine='pyarrow', index=False,
+                                  row_group_size=PARQUET_ROW_GROUP_SIZE, **PARQUET_WRITE_OPTIONS)
                 logger.info(f"Saved {name} to {output_path}")
         logger.info(f"All DataFrames saved to {output_directory}")
 
+    def stream_to_parquet(self, output_directory: str, max_workers: Optional[int] = None) -> None:
+        """
+        Process all JSON files straight into Parquet files without building DataFrames.
+        
+        Conditions, samples and events are appended to their Parquet files one
+        processed file at a time, so only one file's rows are held in memory.
+        The small metadata, component and machine tables are written at the end.
+        
+        Args:
+            output_directory (str): Directory to save Parquet files
+            max_workers (Optional[int]): Number of worker processes (defaults to the CPU count)
+        """
+        import pyarrow.parquet as pq
+        
+        os.makedirs(output_directory, exist_ok=True)
+        schemas = {
+            'conditions': _row_table_schema(CONDITION_COLUMNS),
+            'samples': _row_table_schema(SAMPLE_COLUMNS),
+            'events': _row_table_schema(EVENT_COLUMNS),
+        }
+        writers = {}
+        all_metadata = []
+        all_components = []
+        all_machines = []
+        
+        try:
+            for metadata, conditions, samples, events, components, machine in self.iter_processed_files(max_workers):
+                for name, columns in (('conditions', conditions), ('samples', samples), ('events', events)):
+                    if not columns['timestamp']:
+                        continue
+                    if name not in writers:
+                        output_path = os.path.join(output_directory, f"{name}.parquet")
+                        writers[name] = pq.ParquetWriter(output_path, schemas[name], **PARQUET_WRITE_OPTIONS)
+                    writers[name].write_batch(_to_record_batch(columns, schemas[name]),
+                                              row_group_size=PARQUET_ROW_GROUP_SIZE)
+                
+                all_metadata.append(metadata)
+                all_components.extend(components)
+                all_machines.append(machine)
+        finally:
+            for writer in writers.values():
+                writer.close()
+        
+        for name in writers:
+            logger.info(f"Saved {name} to {os.path.join(output_directory, f'{name}.parquet')}")
+        
+        for name, records in (('metadata', all_metadata), ('components', all_components), ('machines', all_machines)):
+            if records:
+                df = pd.DataFrame(records)
+                if name == 'metadata':
+                    df['created_at'] = pd.to_datetime(df['created_at'], format='ISO8601', errors='coerce', utc=True)
+                output_path = os.path.join(output_directory, f"{name}.parquet")
+                df.to_parquet(output_path, engine='pyarrow', index=False, **PARQUET_WRITE_OPTIONS)
+                logger.info(f"Saved {name} to {output_path}")
+        
+        logger.info(f"All tables saved to {output_directory}")
+
+
+def _row_table_schema(columns: Tuple[str, ...]):
+    """Explicit Arrow schema for a row-level table, so no batch needs type inference."""
+    import pyarrow as pa
+    
+    types = {
+        'timestamp': pa.timestamp('ns', tz='UTC'),
+        'sequence': pa.int64(),
+        'value': pa.large_string(),
+        'value_num': pa.float64(),
+    }
+    # Matches the categorical columns of the DataFrames, so both Parquet writers agree
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        pa.field(column, category if column in CATEGORY_COLUMNS else types.get(column, pa.string()))
+        for column in columns
+    ])
+
+
+def _to_record_batch(columns: Dict[str, List], schema):
+    """Convert one file's column lists into a RecordBatch matching the given schema."""
+    import pyarrow as pa
+    
+    df = pd.DataFrame({column: values for column, values in columns.items() if column != 'value'})
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', errors='coerce', utc=True, cache=True)
+    df['sequence'] = pd.to_numeric(df['sequence'], errors='coerce').astype('Int64')
+    
+    arrays = []
+    for field in schema:
+        if field.name == 'value':
+            arrays.append(_value_text_array(columns['value']))
+        else:
+            arrays.append(pa.Array.from_pandas(df[field.name], type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _iter_streamed_sections(file):
+    """
+    Walk a combined JSON file with ijson in a single pass.
+    
+    Yields ('metadata', dict), ('device', {'name' or 'uuid': value}) and
+    ('component', (component_id, component_data)) tuples; only the value being
+    yielded is ever built in memory.
+    """
+    builder = None
+    depth = 0
+    section = component_id = None
+    
+    for prefix, event, value in ijson.parse(file, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+                if depth == 0:
+                    yield section, builder.value if section == 'metadata' else (component_id, builder.value)
+                    builder = component_id = None
+            continue
+        
+        # Component ids are matched by position rather than prefix, as they may contain dots
+        component_start = component_id is not None and event == 'start_map'
+        if event == 'map_key' and prefix == 'data.device.components':
+            component_id = value
+        elif component_start or (event == 'start_map' and prefix == 'metadata'):
+            section = 'component' if component_start else 'metadata'
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            depth = 1
+        else:
+            component_id = None
+            if prefix in ('data.device.name', 'data.device.uuid') and event not in ('start_map', 'start_array'):
+                yield 'device', {prefix.rsplit('.', 1)[1]: value}
+
+
+def _with_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """Store the low-cardinality identity columns of a row-level table as categoricals."""
+    return df.astype({column: 'category' for column in CATEGORY_COLUMNS if column in df.columns})
+
+
+def _to_arrow_table(df: pd.DataFrame):
+    """
+    Convert a DataFrame to an Arrow table, storing a mixed-type 'value' column as text.
+    
+    Values mix numbers and text, so 'value' is stored as text and the numeric
+    reading is kept alongside it in 'value_num'.
+    """
+    import pyarrow as pa
+    
+    if 'value' not in df.columns:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    position = df.columns.get_loc('value')
+    table = pa.Table.from_pandas(df.drop(columns='value'), preserve_index=False)
+    return table.add_column(position, 'value', _value_text_array(df['value']))
+
+
+def _numeric_value(value) -> float:
+    """Numeric reading of a sample or event value, or NaN when it is not a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _value_text_array(values):
+    """Arrow text column for mixed-type values, keeping missing (None/NaN) values null."""
+    import pyarrow as pa
+    
+    return pa.array([None if v is None or v != v else str(v) for v in values], type=pa.large_string())
+
+
+def _cache_path(filepath: str) -> str:
+    """Path of the sidecar cache holding a JSON file's processed records."""
+    return filepath + '.cache.pkl'
+
+
+def _process_one(filepath: str):
+    """
+    Process one file in a worker process; the reader holds no per-file state.
+    
+    The processed records are cached in a sidecar pickle keyed by the source
+    file's size and modification time (and CACHE_VERSION), so unchanged files
+    skip JSON parsing on later runs.
+    """
+    cache_path = _cache_path(filepath)
+    stat = os.stat(filepath)
+    header = (CACHE_VERSION, stat.st_size, stat.st_mtime_ns)
+    
+    try:
+        with open(cache_path, 'rb') as file:
+            cached_header, result = pickle.load(file)
+        if cached_header == header:
+            logger.debug("Using cached records for %s", os.path.basename(filepath))
+            return result
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cache {cache_path}: {str(e)}")
+    
+    result = CombinedDataReader(os.path.dirname(filepath)).process_file(filepath)
+    if result is None:
+        return None
+    
+    # Write to a temporary file first so a concurrent run never sees a partial cache
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as file:
+            pickle.dump((header, result), file, protocol=5)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write cache {cache_path}: {str(e)}")
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+    
+    return result
+
 
 def main():
     """
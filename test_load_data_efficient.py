@@ -0,0 +1,35 @@
+"""Tests for the binary COPY encoders in load_data_efficient.py"""
+
+import struct
+import unittest
+from datetime import datetime, timedelta
+
+from load_data_efficient import pack_timestamp
+
+
+def unpack_timestamp(field):
+    """Decode a packed TIMESTAMP field back to a naive datetime"""
+    length, micros = struct.unpack('!iq', field)
+    assert length == 8
+    return datetime(2000, 1, 1) + timedelta(microseconds=micros)
+
+
+class PackTimestampTest(unittest.TestCase):
+    def test_utc_fast_path(self):
+        self.assertEqual(unpack_timestamp(pack_timestamp('2025-07-07T15:24:14.123Z')),
+                         datetime(2025, 7, 7, 15, 24, 14, 123000))
+
+    def test_naive_input(self):
+        self.assertEqual(unpack_timestamp(pack_timestamp('2025-07-07 15:24:14')),
+                         datetime(2025, 7, 7, 15, 24, 14))
+        self.assertEqual(unpack_timestamp(pack_timestamp('2025-07-07T15:24:14.5')),
+                         datetime(2025, 7, 7, 15, 24, 14, 500000))
+
+    def test_offset_input_keeps_wall_time(self):
+        # Matches PostgreSQL casting the text to TIMESTAMP, which ignores the offset
+        self.assertEqual(unpack_timestamp(pack_timestamp('2025-07-07T15:24:14+02:00')),
+                         datetime(2025, 7, 7, 15, 24, 14))
+
+
+if __name__ == '__main__':
+    unittest.main()